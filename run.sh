@@ -136,6 +136,30 @@ PYTHON_SCRIPT
     fi
 }
 
+check_audit_timestamps() {
+    # Bancos anteriores à v7.1 guardam audit_log.created_at como texto ISO
+    local db="${DATA_DIR}/app.db"
+    [ -f "$db" ] || return 0
+    
+    if python3 - "$db" <<'PYTHON_SCRIPT'
+import sqlite3, sys
+conn = sqlite3.connect(f"file:{sys.argv[1]}?mode=ro", uri=True)
+columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(audit_log)")}
+sys.exit(1 if columns.get("created_at", "INTEGER").upper() != "INTEGER" else 0)
+PYTHON_SCRIPT
+    then
+        return 0
+    fi
+    print_warning "audit_log ainda usa datas em texto; execute './run.sh migrate-audit' com o app parado"
+}
+
+migrate_audit() {
+    print_header "Migrando Datas da Auditoria"
+    
+    activate_env
+    python scripts/migrate_audit_timestamps.py "${DATA_DIR}/app.db"
+}
+
 verify_pdfs() {
     print_info "Verificando arquivos PDF..."
     
@@ -374,6 +398,7 @@ start_app() {
     activate_env
     check_env_file
     check_embeddings_migration
+    check_audit_timestamps
     
     # Escolher qual app executar
     APP_FILE="${1:-app_enhanced.py}"
@@ -564,6 +589,7 @@ ${GREEN}Manutenção:${NC}
   backup          Cria backup do banco de dados
   logs            Mostra logs recentes
   stats           Mostra estatísticas do sistema
+  migrate-audit   Converte as datas da auditoria para o formato INTEGER
   
 ${GREEN}Documentos e RAG:${NC}
   verify-pdfs     Verifica PDFs nos diretórios de dados
@@ -623,6 +649,9 @@ main() {
         stats)
             show_stats
             ;;
+        migrate-audit)
+            migrate_audit
+            ;;
         verify-pdfs)
             verify_pdfs
             ;;
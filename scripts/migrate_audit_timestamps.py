@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Migração de datas da auditoria
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Converte audit_log.created_at de texto ISO para INTEGER (epoch em µs)
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.services.audit import _AUDIT_LOG_DDL, _to_epoch_us
+
+
+def migrate_created_at(conn: sqlite3.Connection) -> int:
+    """
+    Reescreve um audit_log legado (created_at em texto ISO-8601) com created_at INTEGER.
+    
+    Returns:
+        Número de registros convertidos (0 se a tabela não existe ou já foi migrada)
+    """
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(audit_log)")}
+    if columns.get("created_at", "INTEGER").upper() == "INTEGER":
+        return 0
+    
+    conn.create_function(
+        "iso_to_epoch_us", 1,
+        lambda iso: _to_epoch_us(datetime.fromisoformat(iso)),
+        deterministic=True
+    )
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        # Os triggers FTS pertencem à tabela antiga; o AuditLogger os recria e reconstrói o índice
+        for trigger in ("audit_fts_ai", "audit_fts_ad", "audit_fts_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS audit_fts")
+        conn.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+        conn.execute(_AUDIT_LOG_DDL)
+        converted = conn.execute("""
+            INSERT INTO audit_log (id, user, role, input_text, output_text, metadata, created_at)
+            SELECT id, user, role, input_text, output_text, metadata, iso_to_epoch_us(created_at)
+            FROM audit_log_legacy
+        """).rowcount
+        conn.execute("DROP TABLE audit_log_legacy")
+    return converted
+
+
+def main(db_path: str = "data/app.db"):
+    """Executa a migração uma única vez (não faz nada se já migrado)"""
+    if not Path(db_path).exists():
+        print(f"❌ Banco não encontrado: {db_path}")
+        return 1
+
+    print(f"🔄 Migrando audit_log em {db_path}...")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        converted = migrate_created_at(conn)
+    finally:
+        conn.close()
+
+    if converted:
+        print(f"✅ {converted} registros convertidos para epoch em microssegundos")
+        print("ℹ️ Índices e busca FTS são recriados na próxima inicialização do AuditLogger")
+    else:
+        print("ℹ️ Nada a migrar (tabela ausente ou já no formato INTEGER)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Teste de busca aproximada (HNSW)
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Script de teste comparando a busca HNSW com a busca exata
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import importlib.util
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+DIM = 64
+NUM_CHUNKS = 2000
+RECALL_MIN = 0.8
+
+def _populate(db_path, rng, count, dim=DIM, is_global=1, user_id=None):
+    """Insert one document with `count` random chunks straight into the store's tables"""
+    from src.services.embeddings import quantize_int8
+
+    conn = sqlite3.connect(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(documentos)")}
+    if "is_global" not in columns:
+        conn.execute("ALTER TABLE documentos ADD COLUMN user_id TEXT")
+        conn.execute("ALTER TABLE documentos ADD COLUMN is_global INTEGER DEFAULT 1")
+    doc_id = conn.execute(
+        "INSERT INTO documentos (tipo, titulo, caminho, is_global, user_id) VALUES ('ata', 'Ata de teste', '-', ?, ?)",
+        (is_global, user_id)
+    ).lastrowid
+    for i in range(count):
+        embedding = rng.standard_normal(dim).astype(np.float32)
+        conn.execute(
+            "INSERT INTO chunks (documento_id, conteudo, embedding, embedding_i8, posicao) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, f"chunk {i}", embedding.tobytes(), quantize_int8(embedding).tobytes(), i)
+        )
+    conn.commit()
+    conn.close()
+
+def _wait_for_index(store, query, timeout=30.0):
+    """First ann_search starts the background build; wait until the index is ready"""
+    store.ann_search("", k=1, query_embedding=query)
+    deadline = time.time() + timeout
+    while store._ann_index is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert store._ann_index is not None, "HNSW index was not built in time"
+
+def _recall(store, rng, k=10, trials=20, user_id=None):
+    """Mean overlap between ANN and exact top-k"""
+    hits = 0
+    for _ in range(trials):
+        query = rng.standard_normal(DIM).astype(np.float32)
+        ann = {r['chunk_id'] for r in store.ann_search("", k=k, user_id=user_id, query_embedding=query)}
+        exact = {r['chunk_id'] for r in store.search_by_embedding(query, k=k, user_id=user_id)}
+        hits += len(ann & exact)
+    return hits / (k * trials)
+
+def test_ann_search(db_path):
+    """Test HNSW search against the exact scan"""
+    from src.services.vector_store import VectorStore
+
+    print("=" * 60)
+    print("Testing ANN Search vs Exact Search")
+    print("=" * 60)
+
+    rng = np.random.default_rng(42)
+    store = VectorStore(db_path)
+    _populate(db_path, rng, NUM_CHUNKS)
+    _wait_for_index(store, rng.standard_normal(DIM).astype(np.float32))
+
+    # Test 1: Recall against brute force
+    print("\n1. Testing recall@10...")
+    recall = _recall(store, rng)
+    assert recall >= RECALL_MIN, f"Recall too low: {recall:.2f}"
+    print(f"   ✅ Recall@10 = {recall:.2f}")
+
+    # Test 2: New chunks are appended without a rebuild
+    print("\n2. Testing incremental add...")
+    index = store._ann_index
+    _populate(db_path, rng, 100)
+    recall = _recall(store, rng)
+    assert store._ann_index is index, "Index was rebuilt instead of extended"
+    assert index.get_current_count() == NUM_CHUNKS + 100, "New chunks not indexed"
+    assert recall >= RECALL_MIN, f"Recall too low after add: {recall:.2f}"
+    print(f"   ✅ {index.get_current_count()} chunks indexed, recall@10 = {recall:.2f}")
+
+    # Test 3: Chunks from another embedding model are ignored
+    print("\n3. Testing mixed embedding dimensions...")
+    _populate(db_path, rng, 10, dim=DIM // 2)
+    results = store.ann_search("", k=5, query_embedding=rng.standard_normal(DIM).astype(np.float32))
+    assert len(results) == 5, "Search failed with mixed dimensions"
+    assert index.get_current_count() == NUM_CHUNKS + 100, "Other-dimension chunks were indexed"
+    print("   ✅ Other-dimension chunks skipped")
+
+    # Test 4: Permission filter keeps private documents out
+    print("\n4. Testing permissions...")
+    _populate(db_path, rng, 50, is_global=0, user_id="dono")
+    query = rng.standard_normal(DIM).astype(np.float32)
+    public = store.ann_search("", k=20, query_embedding=query)
+    assert all(r['is_global'] for r in public), "Private chunk leaked to anonymous search"
+    owner = store.ann_search("", k=20, user_id="dono", query_embedding=query)
+    assert len(owner) == 20, "Owner search returned too few results"
+    print("   ✅ Private chunks only visible to their owner")
+
+    print("\n" + "=" * 60)
+    print("✅ All ANN search tests passed!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    if importlib.util.find_spec("hnswlib") is None:
+        print("⚠️ hnswlib not installed: ann_search uses the exact scan, nothing to compare")
+        sys.exit(0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_ann_search(os.path.join(tmp, "ann.db"))
+        print("\n🎉 ALL TESTS PASSED! 🎉\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
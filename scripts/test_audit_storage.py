@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Teste de armazenamento da auditoria
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Script de teste para escrita em lote, busca FTS e migração de datas da auditoria
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.audit import AuditLogger, AuditRecord
+from migrate_audit_timestamps import migrate_created_at
+
+def test_write_behind(db_path):
+    """Test batched background writes and flush"""
+    print("=" * 60)
+    print("Testing Audit Write-Behind")
+    print("=" * 60)
+
+    audit = AuditLogger(db_path)
+
+    # Test 1: Records are queued, flush commits all of them
+    print("\n1. Testing flush after a burst of logs...")
+    for i in range(AuditLogger.BATCH_SIZE * 2 + 5):
+        audit.log(AuditRecord(
+            user="user1",
+            role="publico",
+            input_text=f"Pergunta {i}",
+            output_text=f"Resposta {i}"
+        ))
+    assert audit.flush(), "Flush timed out"
+    count = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+    assert count == AuditLogger.BATCH_SIZE * 2 + 5, f"Expected every record committed, found {count}"
+    print(f"   ✅ Flush works ({count} records committed)")
+
+    # Test 2: Reads see records logged just before them
+    print("\n2. Testing read-after-log...")
+    audit.log(AuditRecord(user="user2", role="secs", input_text="Última", output_text="Ok"))
+    records = audit.list_recent(limit=1, user="user2")
+    assert records and records[0].input_text == "Última", "list_recent missed a queued record"
+    print("   ✅ Reads flush pending records first")
+
+    # Test 3: created_at round-trips through epoch microseconds
+    print("\n3. Testing created_at round-trip...")
+    moment = datetime(2025, 12, 4, 10, 30, 15, 123456)
+    audit.log(AuditRecord(user="user3", role="admin", input_text="t", output_text="t", created_at=moment))
+    assert audit.list_recent(limit=1, user="user3")[0].created_at == moment, "created_at changed"
+    print("   ✅ created_at round-trips exactly")
+
+    # Test 4: A failing batch does not stop the writer
+    print("\n4. Testing writer survival after a bad batch...")
+    class _BrokenRow(tuple):
+        """Row whose parameters cannot be read (raises a non-SQLite error)"""
+        def __len__(self):
+            raise ValueError("broken row")
+
+    audit._queue.put(_BrokenRow())
+    assert audit.flush(), "Flush failed after a bad batch"
+    assert audit._writer.is_alive(), "Writer thread died on a bad batch"
+    audit.log(AuditRecord(user="user4", role="publico", input_text="depois", output_text="ok",
+                          metadata={"when": datetime(2025, 12, 4)}))
+    assert audit.list_recent(limit=1, user="user4"), "Writer stopped after a bad batch"
+    print("   ✅ Writer keeps running")
+
+    print("\n" + "=" * 60)
+    print("✅ All write-behind tests passed!")
+    print("=" * 60)
+
+def test_fts_search(db_path):
+    """Test full-text search over audit records"""
+    print("\n" + "=" * 60)
+    print("Testing Audit FTS Search")
+    print("=" * 60)
+
+    audit = AuditLogger(db_path)
+    audit.log(AuditRecord(
+        user="user1",
+        role="publico",
+        input_text="Qual a pauta da reunião do CONSUNI?",
+        output_text="A pauta inclui a aprovação da ata."
+    ))
+
+    # Test 1: Prefix and accent-insensitive match
+    print("\n1. Testing prefix search...")
+    print(f"   FTS5 available: {audit._fts_available}")
+    results = audit.search("reuniao consu", limit=5)
+    if audit._fts_available:
+        assert len(results) == 1, "FTS prefix search failed"
+    print(f"   ✅ Search works (found {len(results)} results)")
+
+    # Test 2: Blank query
+    print("\n2. Testing blank query...")
+    assert audit.search("   ") == [], "Blank query should return nothing"
+    print("   ✅ Blank query returns no records")
+
+    # Test 3: Index follows inserts
+    print("\n3. Testing FTS sync on insert...")
+    audit.log(AuditRecord(user="user1", role="publico", input_text="portaria nova", output_text="ok"))
+    assert len(audit.search("portaria", limit=5)) == 1, "New record not searchable"
+    print("   ✅ New records are searchable")
+
+    print("\n" + "=" * 60)
+    print("✅ All FTS search tests passed!")
+    print("=" * 60)
+
+def test_timestamp_migration(db_path):
+    """Test the TEXT -> INTEGER created_at migration"""
+    print("\n" + "=" * 60)
+    print("Testing Audit Timestamp Migration")
+    print("=" * 60)
+
+    # Legacy table with ISO-8601 text timestamps
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user TEXT NOT NULL,
+            role TEXT NOT NULL,
+            input_text TEXT NOT NULL,
+            output_text TEXT NOT NULL,
+            metadata TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT INTO audit_log (user, role, input_text, output_text, metadata, created_at) "
+        "VALUES ('user1', 'publico', 'pauta antiga', 'ok', '{}', '2025-11-30T08:15:00.250000')"
+    )
+    conn.commit()
+
+    # Test 1: The logger refuses to start on a legacy table
+    print("\n1. Testing legacy TEXT mode...")
+    legacy = AuditLogger(db_path)
+    assert legacy.legacy_timestamps, "Legacy TEXT table not detected"
+    legacy.log(AuditRecord(user="user2", role="secs", input_text="pauta nova", output_text="ok"))
+    records = legacy.list_recent(limit=5)
+    assert len(records) == 2, "Legacy rows not readable"
+    assert records[-1].created_at == datetime(2025, 11, 30, 8, 15, 0, 250000), "Legacy timestamp misread"
+    assert legacy.get_stats()['last_24h'] == 1, "Legacy 24h window wrong"
+    print("   ✅ Logger keeps working on the legacy table")
+
+    # Test 2: Migration converts every row, then is a no-op
+    print("\n2. Testing migration...")
+    assert migrate_created_at(conn) == 2, "Migration did not convert the legacy rows"
+    assert migrate_created_at(conn) == 0, "Second migration should do nothing"
+    conn.close()
+    print("   ✅ Migration converts once")
+
+    # Test 3: Migrated data is readable and searchable
+    print("\n3. Testing migrated data...")
+    audit = AuditLogger(db_path)
+    assert not audit.legacy_timestamps, "Table still in legacy mode after migration"
+    records = audit.list_recent(limit=2)
+    assert records[-1].created_at == datetime(2025, 11, 30, 8, 15, 0, 250000), "Timestamp changed"
+    if audit._fts_available:
+        assert len(audit.search("antiga")) == 1, "FTS index not rebuilt after migration"
+    print("   ✅ Migrated records keep their timestamps")
+
+    print("\n" + "=" * 60)
+    print("✅ All migration tests passed!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_write_behind(os.path.join(tmp, "write_behind.db"))
+            test_fts_search(os.path.join(tmp, "fts.db"))
+            test_timestamp_migration(os.path.join(tmp, "migration.db"))
+        print("\n🎉 ALL TESTS PASSED! 🎉\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Teste de autenticação e sessões
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Script de teste para rehash de senhas no login e cache de sessões
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+import sys
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import auth
+from src.services.auth import AuthService, ARGON2_SUPPORT
+from src.services.user_service import UserService
+
+def _stored_hash(db_path, username):
+    return sqlite3.connect(db_path).execute(
+        "SELECT password_hash FROM users WHERE username = ?", (username,)
+    ).fetchone()[0]
+
+def test_rehash_on_login(db_path):
+    """Test lazy migration of password hashes on login"""
+    print("=" * 60)
+    print("Testing Password Rehash on Login")
+    print("=" * 60)
+
+    service = AuthService(db_path)
+    current_prefix = "$argon2" if ARGON2_SUPPORT else "scrypt$"
+    print(f"\n   argon2-cffi available: {ARGON2_SUPPORT}")
+
+    # Legacy unsalted SHA-256 account
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO users (username, password_hash, full_name, email, role) VALUES (?, ?, ?, ?, ?)",
+        ("legado", hashlib.sha256(b"senha123").hexdigest(), "Conta Legada", "legado@ufal.br", "public")
+    )
+    conn.commit()
+
+    # Test 1: Wrong password does not touch the hash
+    print("\n1. Testing failed login...")
+    assert service.login("legado", "errada") is None, "Wrong password accepted"
+    assert not _stored_hash(db_path, "legado").startswith(current_prefix), "Hash changed on failed login"
+    print("   ✅ Failed login keeps the legacy hash")
+
+    # Test 2: Successful login stores the current KDF
+    print("\n2. Testing rehash on successful login...")
+    assert service.login("legado", "senha123") is not None, "Legacy login failed"
+    assert _stored_hash(db_path, "legado").startswith(current_prefix), "Hash was not upgraded"
+    print(f"   ✅ Hash upgraded to {current_prefix}")
+
+    # Test 3: The upgraded hash still verifies
+    print("\n3. Testing login with the upgraded hash...")
+    assert service.login("legado", "senha123") is not None, "Login after rehash failed"
+    print("   ✅ Upgraded hash verifies")
+
+    print("\n" + "=" * 60)
+    print("✅ All rehash tests passed!")
+    print("=" * 60)
+
+def test_session_cache(db_path):
+    """Test session lookup caching and invalidation"""
+    print("\n" + "=" * 60)
+    print("Testing Session Cache")
+    print("=" * 60)
+
+    service = AuthService(db_path)
+    auth._auth_service = service
+    users = UserService(db_path)
+
+    # Test 1: Valid sessions are cached, bounded by SESSION_CACHE_TTL
+    print("\n1. Testing cached lookup...")
+    user, token = service.login("secs", "secs123")
+    assert service.get_user_by_session(token).username == "secs", "Session lookup failed"
+    remaining = service._session_cache[token][1] - time.monotonic()
+    assert 0 < remaining <= AuthService.SESSION_CACHE_TTL, "Cache entry outlives the TTL"
+    print("   ✅ Session lookup cached")
+
+    # Test 2: Cache entries never outlive the session
+    print("\n2. Testing expiry cap...")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "UPDATE sessions SET expires_at = ? WHERE session_token = ?",
+        (datetime.now() + timedelta(seconds=3), token)
+    )
+    conn.commit()
+    service.invalidate_user_sessions("secs")
+    service.get_user_by_session(token)
+    remaining = service._session_cache[token][1] - time.monotonic()
+    assert remaining <= 3, f"Cache entry outlives the session ({remaining:.1f}s)"
+    print("   ✅ Cache entry bounded by expires_at")
+
+    # Test 3: Role changes and deletions drop cached sessions
+    print("\n3. Testing invalidation on account changes...")
+    users.update_role("secs", "admin")
+    assert token not in service._session_cache, "Role change kept the cached session"
+    service.get_user_by_session(token)
+    users.delete_user("secs")
+    assert token not in service._session_cache, "Deletion kept the cached session"
+    assert service.get_user_by_session(token) is None, "Deleted user still resolves"
+    print("   ✅ Cached sessions dropped on role change and deletion")
+
+    # Test 4: Logout
+    print("\n4. Testing logout...")
+    _, token = service.login("admin", "admin123")
+    service.get_user_by_session(token)
+    service.logout(token)
+    assert service.get_user_by_session(token) is None, "Session survived logout"
+    print("   ✅ Logout invalidates the cached session")
+
+    print("\n" + "=" * 60)
+    print("✅ All session cache tests passed!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_rehash_on_login(os.path.join(tmp, "rehash.db"))
+            test_session_cache(os.path.join(tmp, "sessions.db"))
+        print("\n🎉 ALL TESTS PASSED! 🎉\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
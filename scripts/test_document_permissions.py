@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Teste de permissões de documentos
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Script de teste para upload, indexação e alternância global/privado
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+import io
+import sys
+import os
+import sqlite3
+import tempfile
+import importlib.util
+
+# Add parent and src directories to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+def _prepare_db(db_path):
+    """Create the vector store tables with the permission columns used by search"""
+    from services.vector_store import VectorStore
+
+    VectorStore(db_path)
+    conn = sqlite3.connect(db_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(documentos)")}
+    if "is_global" not in columns:
+        conn.execute("ALTER TABLE documentos ADD COLUMN user_id TEXT DEFAULT 'system'")
+        conn.execute("ALTER TABLE documentos ADD COLUMN is_global BOOLEAN DEFAULT 1")
+    conn.commit()
+    conn.close()
+
+def _index(doc, db_path):
+    """Index a couple of chunks for an uploaded document, as the upload page does"""
+    from utils.vector_store_helper import add_chunks_to_vector_store
+
+    add_chunks_to_vector_store([
+        {
+            "text": f"Trecho {i} do {doc.original_name}",
+            "page": i,
+            "metadata": {"source": doc.original_name, "doc_id": doc.id, "user_id": doc.user_id,
+                         "is_global": bool(doc.is_global)}
+        }
+        for i in range(2)
+    ], db_path=db_path)
+
+def test_upload_index_toggle(db_path):
+    """Test that the global toggle reaches the vector store row of a new upload"""
+    from services.document_manager import DocumentManager
+    from components.document_permissions_panel import set_documents_global
+
+    print("=" * 60)
+    print("Testing Upload -> Index -> Global Toggle")
+    print("=" * 60)
+
+    _prepare_db(db_path)
+    manager = DocumentManager(db_path)
+    doc = manager.upload_document(io.BytesIO(b"%PDF-1.4 teste"), "regimento.pdf", "user1", role="admin")
+    conn = sqlite3.connect(db_path)
+
+    # Test 1: Indexing creates the documentos row and links it
+    print("\n1. Testing indexing link...")
+    _index(doc, db_path)
+    documento_id = conn.execute("SELECT documento_id FROM documents WHERE id = ?", (doc.id,)).fetchone()[0]
+    assert documento_id is not None, "documents.documento_id not set on indexing"
+    chunk_ids = {row[0] for row in conn.execute("SELECT DISTINCT documento_id FROM chunks")}
+    assert chunk_ids == {documento_id}, f"Chunks point to {chunk_ids}, expected {documento_id}"
+    user_id, is_global = conn.execute(
+        "SELECT user_id, is_global FROM documentos WHERE id = ?", (documento_id,)
+    ).fetchone()
+    assert user_id == "user1" and not is_global, "documentos row lost the upload's owner/visibility"
+    print(f"   ✅ Upload {doc.id} linked to documentos {documento_id}")
+
+    # Test 2: Toggling updates both tables
+    print("\n2. Testing global toggle...")
+    set_documents_global([(True, doc.id)])
+    assert conn.execute("SELECT is_global FROM documents WHERE id = ?", (doc.id,)).fetchone()[0], \
+        "documents.is_global not updated"
+    assert conn.execute("SELECT is_global FROM documentos WHERE id = ?", (documento_id,)).fetchone()[0], \
+        "documentos.is_global not updated"
+    set_documents_global([(False, doc.id)])
+    assert not conn.execute("SELECT is_global FROM documentos WHERE id = ?", (documento_id,)).fetchone()[0], \
+        "documentos.is_global not reverted"
+    print("   ✅ Toggle reaches documentos")
+
+    # Test 3: Reindexing reuses the linked row
+    print("\n3. Testing reindex...")
+    _index(doc, db_path)
+    count = conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+    assert count == 1, f"Reindex created another documentos row ({count})"
+    print("   ✅ Reindex keeps a single documentos row")
+
+    conn.close()
+
+    print("\n" + "=" * 60)
+    print("✅ All document permission tests passed!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    if importlib.util.find_spec("streamlit") is None:
+        print("⚠️ streamlit not installed: the permissions panel cannot be imported")
+        sys.exit(0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # The panel opens data/app.db relative to the working directory
+            os.chdir(tmp)
+            os.makedirs("data")
+            test_upload_index_toggle(os.path.join("data", "app.db"))
+        print("\n🎉 ALL TESTS PASSED! 🎉\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
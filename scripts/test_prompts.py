@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Teste de classificação de prompts
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Script de teste para a detecção de mensagens triviais
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.prompts import is_trivial_prompt, TRIVIAL_PROMPT_MAX_WORDS
+
+def test_trivial_prompt():
+    """Test the word-count boundary and greeting detection"""
+    print("=" * 60)
+    print("Testing Trivial Prompt Detection")
+    print("=" * 60)
+
+    # Test 1: Word-count boundary
+    print(f"\n1. Testing boundary ({TRIVIAL_PROMPT_MAX_WORDS} words)...")
+    assert is_trivial_prompt("ok"), "One word should be trivial"
+    assert is_trivial_prompt("entendi, obrigado"), "Two words should be trivial"
+    assert not is_trivial_prompt("prazo de matrícula"), "Three-word question treated as trivial"
+    assert not is_trivial_prompt("qual o prazo de matrícula?"), "Question treated as trivial"
+    print("   ✅ Only messages up to the limit are trivial")
+
+    # Test 2: Greetings of any length
+    print("\n2. Testing greetings...")
+    assert is_trivial_prompt("Boa tarde!"), "Greeting not detected"
+    assert is_trivial_prompt("  obrigada  "), "Greeting with spaces not detected"
+    assert not is_trivial_prompt("bom dia, qual a pauta do CONSUNI?"), "Question after greeting treated as trivial"
+    print("   ✅ Greetings detected, questions kept")
+
+    print("\n" + "=" * 60)
+    print("✅ All prompt tests passed!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    try:
+        test_trivial_prompt()
+        print("\n🎉 ALL TESTS PASSED! 🎉\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
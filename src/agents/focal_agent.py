@@ -109,7 +109,8 @@ class FocalAgent:
         
         return None
     
-    def run(self, question: str, k: int = 5, user_id: Optional[str] = None) -> AgentResult:
+    def run(self, question: str, k: int = 5, user_id: Optional[str] = None,
+            query_embedding=None) -> AgentResult:
         """
         Execute focal search with user permissions.
         
@@ -117,6 +118,8 @@ class FocalAgent:
             question: User's question
             k: Number of results to return
             user_id: User ID for permission filtering
+            query_embedding: Optional pre-computed embedding of question,
+                reused when the tool does not rewrite the query
             
         Returns:
             AgentResult with tool used and retrieved chunks
@@ -141,24 +144,25 @@ class FocalAgent:
         if tool.name in ['pauta', 'ata', 'resolucao', 'portaria']:
             filters['tipo'] = tool.name
         
+        # The caller's embedding only matches when the query was not rewritten
+        if enhanced_query != question:
+            query_embedding = None
+        
         # Execute search with user_id for permissions
         try:
             if filters:
-                results = self.vector_store.search_with_filter(enhanced_query, filters, k=k, user_id=user_id)
+                results = self.vector_store.search_with_filter(
+                    enhanced_query, filters, k=k, user_id=user_id, query_embedding=query_embedding
+                )
+            elif query_embedding is not None:
+                results = self.vector_store.search_by_embedding(query_embedding, k=k, user_id=user_id)
             else:
                 # For tools without direct type filter, search all
                 results = self.vector_store.search(enhanced_query, k=k, user_id=user_id)
                 
                 # Post-filter by keywords if needed
                 if tool.filter_terms:
-                    filtered = []
-                    for r in results:
-                        content_lower = r.get('conteudo', '').lower()
-                        source_lower = r.get('titulo', '').lower()
-                        if any(term in content_lower or term in source_lower 
-                               for term in tool.filter_terms):
-                            filtered.append(r)
-                    results = filtered[:k]
+                    results = self._match_terms(tool, results)[:k]
             
             return AgentResult(
                 tool=tool.name,
@@ -169,6 +173,48 @@ class FocalAgent:
             print(f"Focal agent error: {e}")
             return AgentResult(tool=tool.name, chunks=[], enhanced_query=enhanced_query)
 
+    
+    @staticmethod
+    def _match_terms(tool: ToolConfig, chunks: List) -> List:
+        """Keep chunks whose content or title mentions one of the tool's filter terms"""
+        filtered = []
+        for r in chunks:
+            content_lower = r.get('conteudo', '').lower()
+            source_lower = r.get('titulo', '').lower()
+            if any(term in content_lower or term in source_lower 
+                   for term in tool.filter_terms):
+                filtered.append(r)
+        return filtered
+    
+    def filter(self, question: str, candidates: List, k: int = 5) -> AgentResult:
+        """
+        Apply the focal tool to an already retrieved candidate list.
+        
+        Used with a single shared ANN search instead of a dedicated search
+        per tool; candidates must already respect user permissions.
+        
+        Args:
+            question: User's question
+            candidates: Ranked chunks from the vector store
+            k: Number of results to return
+            
+        Returns:
+            AgentResult with tool used and the matching candidates
+        """
+        tool = self.pick_tool(question)
+        
+        if not tool:
+            return AgentResult(tool=None, chunks=[], enhanced_query=question)
+        
+        if tool.name in ['pauta', 'ata', 'resolucao', 'portaria']:
+            chunks = [c for c in candidates if c.get('tipo') == tool.name]
+        elif tool.filter_terms:
+            chunks = self._match_terms(tool, candidates)
+        else:
+            chunks = list(candidates)
+        
+        return AgentResult(tool=tool.name, chunks=chunks[:k], enhanced_query=question)
+
 
 # Singleton
 _focal_agent = None
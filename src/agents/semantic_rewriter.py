@@ -18,7 +18,7 @@ Compatibilidade: Python 3.11+
 
 import re
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
 
 @dataclass
@@ -28,6 +28,7 @@ class SemanticEnrichment:
     heuristics: List[str]
     alternates: List[str]
     confidence: float = 0.8
+    query_embedding: Optional[Any] = None
 
 
 class SemanticRewriter:
@@ -121,13 +122,16 @@ class SemanticRewriter:
         
         return alternates
     
-    def enrich(self, question: str, use_llm: bool = True) -> SemanticEnrichment:
+    def enrich(self, question: str, use_llm: bool = True,
+               embed_fn: Optional[Callable[[str], Any]] = None) -> SemanticEnrichment:
         """
         Complete enrichment pipeline.
         
         Args:
             question: Original user question
             use_llm: Whether to use LLM rewriting (slower but better)
+            embed_fn: Optional embedder; when given, the rewritten query is
+                embedded once here and shared by all downstream retrieval
             
         Returns:
             SemanticEnrichment with rewritten query and metadata
@@ -154,11 +158,15 @@ class SemanticRewriter:
         if use_llm and llm_result:
             confidence = min(confidence + 0.1, 1.0)
         
+        # 6. Embed the final query once for retrieval and caching
+        query_embedding = embed_fn(rewritten) if embed_fn else None
+        
         return SemanticEnrichment(
             rewritten=rewritten,
             heuristics=heuristics,
             alternates=alternates,
-            confidence=confidence
+            confidence=confidence,
+            query_embedding=query_embedding
         )
 
 
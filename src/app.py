@@ -347,9 +347,13 @@ INSTRUÇÕES IMPORTANTES:
                             if stream:
                                 try:
                                     for chunk in stream:
-                                        if chunk.choices[0].delta.content is not None:
-                                            full_response += chunk.choices[0].delta.content
-                                            message_placeholder.markdown(full_response + "▌")
+                                        delta = chunk.choices[0].delta.content
+                                        if delta is not None:
+                                            # Draw the text so far only once more text follows;
+                                            # the last chunk is drawn once, by the final render
+                                            if full_response:
+                                                message_placeholder.markdown(full_response + "▌")
+                                            full_response += delta
                                     message_placeholder.markdown(full_response)
                                     
                                     # Show sources
@@ -19,30 +19,78 @@ Compatibilidade: Python 3.11+
 import streamlit as st
 import sys
 import os
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.llm import llm_service
 from config import get_settings
-from utils.prompts import WELCOME_MESSAGE, GUARDRAIL_MESSAGES, check_scope
+from utils.prompts import WELCOME_MESSAGE, GUARDRAIL_MESSAGES, check_scope, is_trivial_prompt
+from utils.logger import get_logger
 
 # Authentication and Admin
 from components.auth_panel import auth_panel
 from components.first_user_wizard import first_user_wizard, check_first_user
 from services.user_service import get_user_service
 
+logger = get_logger(__name__)
+
 # Initialize settings
 settings = get_settings()
 
+# Wait (seconds) for the user cache before continuing with the speculative rewrite;
+# a slower probe is not a miss, its answer is checked again before generation
+CACHE_LOOKUP_TIMEOUT = 0.02
+
+# ANN candidates handed to the focal agent; its tipo/term filter keeps the top 5
+FOCAL_CANDIDATES = 50
+
+# Chat history kept in session state, and the window sent to the LLM
+MAX_HISTORY = 200
+HISTORY_WINDOW = 10
+
+# Fields shown per retrieved chunk in the sources expander (always set by the vector store)
+_SOURCE_FIELDS = itemgetter("titulo", "similarity")
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for chat work that runs off the script thread"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="secs-chat")
+
+
 # Initialize user service
 user_service = get_user_service()
 
+# Check if first user needs to be created (before any heavy service init)
+if not check_first_user():
+    st.set_page_config(
+        page_title="SECS Chatbot - Setup",
+        page_icon="🏛️",
+        layout="wide"
+    )
+    first_user_wizard()
+    st.stop()
+
+# Page Config (before anything can render, including cache spinners)
+st.set_page_config(
+    page_title="SECS Chatbot",
+    page_icon="🏛️",
+    layout="wide"
+)
+
 # Import all services
-try:
+@st.cache_resource(show_spinner=False)
+def _init_services() -> SimpleNamespace:
+    """Build the chat service graph once per server process (raises if unavailable)"""
     from services.vector_store import get_vector_store
     from services.cache_service import get_cache_service
-    from services.audit import get_audit_logger, AuditRecord
+    from services.audit import get_audit_logger
     from services.count_helper import get_count_helper
     from services.prompt_enricher import get_prompt_enricher
     from agents.query_enhancer import get_query_enhancer
@@ -51,40 +99,41 @@ try:
     from agents.clarification_agent import get_clarification_agent
     
     vector_store = get_vector_store()
-    cache_service = get_cache_service()
-    audit_logger = get_audit_logger()
-    count_helper = get_count_helper()
-    prompt_enricher = get_prompt_enricher()
-    query_enhancer = get_query_enhancer()
-    semantic_rewriter = get_semantic_rewriter(llm_service)
-    focal_agent = get_focal_agent(vector_store)
-    clarification_agent = get_clarification_agent()
+    return SimpleNamespace(
+        vector_store=vector_store,
+        cache_service=get_cache_service(),
+        audit_logger=get_audit_logger(),
+        count_helper=get_count_helper(),
+        prompt_enricher=get_prompt_enricher(),
+        query_enhancer=get_query_enhancer(),
+        semantic_rewriter=get_semantic_rewriter(llm_service),
+        focal_agent=get_focal_agent(vector_store),
+        clarification_agent=get_clarification_agent(),
+    )
+
+
+try:
+    from services.audit import AuditRecord
+    
+    svc = _init_services()
+    vector_store = svc.vector_store
+    cache_service = svc.cache_service
+    audit_logger = svc.audit_logger
+    count_helper = svc.count_helper
+    prompt_enricher = svc.prompt_enricher
+    query_enhancer = svc.query_enhancer
+    semantic_rewriter = svc.semantic_rewriter
+    focal_agent = svc.focal_agent
+    clarification_agent = svc.clarification_agent
     
     ALL_SERVICES_AVAILABLE = True
 except Exception as e:
-    print(f"Warning: Some services not available: {e}")
+    logger.warning("Some services not available", error=e)
     ALL_SERVICES_AVAILABLE = False
 
-# Check if first user needs to be created
-if not check_first_user():
-    st.set_page_config(
-        page_title="SECS Chatbot - Setup",
-        page_icon="🏛️",
-        layout="wide"
-    )
-    first_user_wizard()
-    st.stop()
-
-# Page Config
-st.set_page_config(
-    page_title="SECS Chatbot",
-    page_icon="🏛️",
-    layout="wide"
-)
-
 # Initialize session state
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = deque(maxlen=MAX_HISTORY)
 if "user_id" not in st.session_state:
     st.session_state.user_id = "anon"
 if "last_cache_source" not in st.session_state:
@@ -123,7 +172,7 @@ with st.sidebar:
     st.markdown("---")
     
     if st.button("🗑️ Limpar Conversa", use_container_width=True):
-        st.session_state.messages = []
+        st.session_state.messages = deque(maxlen=MAX_HISTORY)
         st.session_state.last_cache_source = None
         st.session_state.last_enrichment = None
         st.session_state.last_retrieved = []
@@ -159,16 +208,9 @@ st.title("💬 SECS Chatbot")
 st.caption(f"Modelo: {settings.llm_model}")
 st.caption(f"Ambiente: {settings.environment}")
 
-# Main App - Tabs
-tabs = st.tabs(["💬 Chat", "📤 Meus Documentos", "📊 Auditoria", "📈 Estatísticas", "📚 Documentação", "⚙️ Admin"])
-
-# ===== TAB 1: CHAT =====
-with tabs[0]:
-    st.title("Assistente Virtual - Conselhos Superiores")
-    st.markdown("*Secretaria dos Conselhos Superiores (SECS) - UFAL*")
-    
-    # Real-time metrics
-    if ALL_SERVICES_AVAILABLE:
+def render_chat_metrics(placeholder):
+    """Render last-turn pipeline metrics from session state into placeholder"""
+    with placeholder.container():
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
@@ -186,7 +228,20 @@ with tabs[0]:
         with col4:
             agent_tool = st.session_state.last_agent_tool
             st.metric("🤖 Agente", agent_tool or "Nenhum")
-        
+
+
+# Main App - Tabs
+tabs = st.tabs(["💬 Chat", "📤 Meus Documentos", "📊 Auditoria", "📈 Estatísticas", "📚 Documentação", "⚙️ Admin"])
+
+# ===== TAB 1: CHAT =====
+with tabs[0]:
+    st.title("Assistente Virtual - Conselhos Superiores")
+    st.markdown("*Secretaria dos Conselhos Superiores (SECS) - UFAL*")
+    
+    # Real-time metrics (refreshed in place after each turn)
+    metrics_placeholder = st.empty()
+    if ALL_SERVICES_AVAILABLE:
+        render_chat_metrics(metrics_placeholder)
         st.markdown("---")
     
     # Display chat history
@@ -226,65 +281,99 @@ with tabs[0]:
                 full_response = ""
                 sources = []
                 
-                # Check cache first
+                # Check cache while semantic rewriting starts speculatively;
+                # the rewrite is cancelled (or its result discarded) on a verified hit
                 if ALL_SERVICES_AVAILABLE:
-                    cached = cache_service.get_user_answer(st.session_state.user_id, prompt)
+                    user_id = st.session_state.user_id
+                    executor = get_executor()
+                    # Short prompts and greetings skip the LLM rewrite and clarification
+                    trivial = is_trivial_prompt(prompt)
+                    fut_cache = executor.submit(cache_service.get_user_answer, user_id, prompt)
+                    fut_enrich = executor.submit(
+                        semantic_rewriter.enrich, prompt, use_llm=not trivial, embed_fn=vector_store.embed
+                    )
+                    try:
+                        cached = fut_cache.result(timeout=CACHE_LOOKUP_TIMEOUT)
+                    except FutureTimeoutError:
+                        cached = None
                     if cached and not cache_service.should_bypass_cache(cached):
+                        fut_enrich.cancel()
                         full_response = cached
                         message_placeholder.markdown(full_response)
                         st.caption("⚡ Resposta do cache (usuário)")
                         st.session_state.last_cache_source = "user"
                         
-                        if ALL_SERVICES_AVAILABLE:
-                            audit_logger.log(AuditRecord(
-                                user=st.session_state.user_id,
-                                role="publico",
-                                input_text=prompt,
-                                output_text=full_response,
-                                metadata={"cache_hit": "user"}
-                            ))
-                        
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": full_response,
-                            "sources": []
-                        })
-                        st.rerun()
+                        executor.submit(audit_logger.log, AuditRecord(
+                            user=user_id,
+                            role="publico",
+                            input_text=prompt,
+                            output_text=full_response,
+                            metadata={"cache_hit": "user"}
+                        ))
                 
                 # If not cached, process with RAG
                 if not full_response and ALL_SERVICES_AVAILABLE:
                     try:
-                        # 1. Semantic rewriting
-                        enrichment = semantic_rewriter.enrich(prompt, use_llm=True)
+                        # 1. Semantic rewriting + query embedding (already started alongside the cache check)
+                        enrichment = fut_enrich.result()
                         st.session_state.last_enrichment = enrichment
                         
-                        # 2. Focal agent search with user permissions
-                        agent_result = focal_agent.run(
+                        # 2. Single ANN search with user permissions, reusing the turn's embedding
+                        query_embedding = enrichment.query_embedding
+                        if query_embedding is None:
+                            query_embedding = vector_store.embed(enrichment.rewritten)
+                        candidates = vector_store.ann_search(
                             enrichment.rewritten,
-                            k=5,
-                            user_id=st.session_state.user_id
+                            k=FOCAL_CANDIDATES,
+                            user_id=user_id,
+                            query_embedding=query_embedding
                         )
-                        st.session_state.last_agent_tool = agent_result.tool
                         
-                        # 3. Regular RAG search (fallback) with user permissions
-                        search_results = vector_store.search(
-                            enrichment.rewritten, 
-                            k=5,
-                            user_id=st.session_state.user_id
-                        )
+                        # 3. Focal agent narrows the candidates; plain top-5 is the fallback
+                        agent_result = focal_agent.filter(enrichment.rewritten, candidates, k=5)
+                        st.session_state.last_agent_tool = agent_result.tool
                         
                         # Combine results
-                        all_chunks = agent_result.chunks if agent_result.chunks else search_results
+                        all_chunks = agent_result.chunks or candidates[:5]
                         st.session_state.last_retrieved = all_chunks
                         
                         # 4. Derive facts
                         derived_facts = count_helper.derive_counts(prompt, all_chunks)
                         st.session_state.last_derived_facts = derived_facts
                         
-                        # 5. Check clarification
-                        clarification = clarification_agent.check_for_ambiguity(prompt, all_chunks, st.session_state.messages)
+                        # 5. Verify the speculation: a user-cache probe that outlived
+                        # CACHE_LOOKUP_TIMEOUT still wins over generating a new answer
+                        late = fut_cache.result()
+                        user_hit = late if late and not cache_service.should_bypass_cache(late) else None
+                        
+                        # Semantic cache: paraphrased question grounded on the same evidence
+                        chunk_ids = [c['chunk_id'] for c in all_chunks]
+                        semantic_hit = None if user_hit else cache_service.semantic_lookup(
+                            user_id, query_embedding, chunk_ids
+                        )
+                        cache_hit = "user" if user_hit else "semantic" if semantic_hit else None
+                        
+                        # Warm the LLM prefix cache while clarification/enrichment run
+                        if settings.llm_prefix_prewarm and not cache_hit:
+                            executor.submit(llm_service.prewarm_prefix, prompt_enricher.build_system_prefix(all_chunks))
                         
-                        if clarification and clarification.confidence > 0.7:
+                        # 6. Check clarification
+                        clarification = None
+                        if not cache_hit and not trivial:
+                            clarification = clarification_agent.check_for_ambiguity(prompt, all_chunks, st.session_state.messages)
+                        
+                        llm_answered = False
+                        if user_hit:
+                            full_response = user_hit
+                            message_placeholder.markdown(full_response)
+                            st.caption("⚡ Resposta do cache (usuário)")
+                            st.session_state.last_cache_source = "user"
+                        elif semantic_hit:
+                            full_response = semantic_hit
+                            message_placeholder.markdown(full_response)
+                            st.caption("⚡ Resposta do cache (semântico)")
+                            st.session_state.last_cache_source = "semantic"
+                        elif clarification and clarification.confidence > 0.7:
                             # Ask for clarification
                             full_response = f"🤔 {clarification.question}\n\n"
                             if clarification.options:
@@ -294,68 +383,76 @@ with tabs[0]:
                             full_response += "\nPor favor, seja mais específico."
                             message_placeholder.markdown(full_response)
                         else:
-                            # 6. Enrich prompt
+                            # 7. Enrich prompt
                             enriched = prompt_enricher.enrich(
                                 user_question=prompt,
                                 chunks=all_chunks,
-                                history=st.session_state.messages[-10:],  # Last 10 messages
+                                history=list(islice(reversed(st.session_state.messages), HISTORY_WINDOW))[::-1],
                                 semantic_enrichment=enrichment,
                                 derived_facts=derived_facts,
                                 agent_tool=agent_result.tool
                             )
                             
-                            # 7. Call LLM
+                            # 8. Call LLM
                             stream = llm_service.get_response(enriched.messages)
                             
-                            for chunk in stream:
-                                if chunk.choices[0].delta.content:
-                                    full_response += chunk.choices[0].delta.content
-                                    message_placeholder.markdown(full_response + "▌")
-                            
-                            message_placeholder.markdown(full_response)
+                            # Native streaming: Streamlit throttles the incremental renders
+                            with message_placeholder.container():
+                                full_response = st.write_stream(
+                                    c.choices[0].delta.content or "" for c in stream
+                                )
+                            llm_answered = True
                             
                             # Show sources
                             if all_chunks:
-                                sources = [f"{c.get('titulo', 'Doc')} ({c.get('similarity', 0):.1%})" 
-                                          for c in all_chunks[:5]]
+                                sources = [f"{titulo} ({similarity:.1%})"
+                                          for titulo, similarity in map(_SOURCE_FIELDS, all_chunks[:5])]
                                 with st.expander("📚 Fontes consultadas"):
                                     for source in sources:
                                         st.caption(f"• {source}")
                         
-                        # Cache response
-                        if not cache_service.should_bypass_cache(full_response):
-                            cache_service.set_user_answer(st.session_state.user_id, prompt, full_response)
-                            cache_service.set_global_answer(prompt, full_response)
+                        # Cache response (fire-and-forget, off the script thread)
+                        if not cache_hit and not cache_service.should_bypass_cache(full_response):
+                            executor.submit(cache_service.set_user_answer, user_id, prompt, full_response)
+                            executor.submit(cache_service.set_global_answer, prompt, full_response)
+                            if llm_answered:
+                                executor.submit(
+                                    cache_service.set_semantic_answer, user_id,
+                                    prompt, query_embedding, chunk_ids, full_response
+                                )
                         
                         # Audit log
-                        if ALL_SERVICES_AVAILABLE:
-                            audit_logger.log(AuditRecord(
-                                user=st.session_state.user_id,
-                                role="publico",
-                                input_text=prompt,
-                                output_text=full_response,
-                                metadata={
-                                    "cache_hit": None,
-                                    "num_chunks": len(all_chunks),
-                                    "agent_tool": agent_result.tool,
-                                    "derived_facts": len(derived_facts)
-                                }
-                            ))
+                        executor.submit(audit_logger.log, AuditRecord(
+                            user=user_id,
+                            role="publico",
+                            input_text=prompt,
+                            output_text=full_response,
+                            metadata={
+                                "cache_hit": cache_hit,
+                                "num_chunks": len(all_chunks),
+                                "agent_tool": agent_result.tool,
+                                "derived_facts": len(derived_facts)
+                            }
+                        ))
                         
                     except Exception as e:
                         full_response = f"Erro ao processar: {str(e)}"
                         message_placeholder.error(full_response)
                 
-                # Add to history
+                # Add to history (already rendered above, no rerun needed)
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": full_response,
                     "sources": sources
                 })
-                st.rerun()
+            
+            if ALL_SERVICES_AVAILABLE:
+                render_chat_metrics(metrics_placeholder)
 
 # ===== TAB 2: MEUS DOCUMENTOS =====
-with tabs[1]:
+@st.fragment
+def _tab_documents():
+    """Meus Documentos tab, rerun on its own when its widgets change"""
     try:
         from components.document_upload import render_document_upload
         
@@ -366,8 +463,14 @@ with tabs[1]:
         import traceback
         st.code(traceback.format_exc())
 
+
+with tabs[1]:
+    _tab_documents()
+
 # ===== TAB 3: AUDITORIA =====
-with tabs[2]:
+@st.fragment
+def _tab_audit():
+    """Auditoria tab, rerun on its own when its widgets change"""
     st.subheader("📊 Auditoria de Conversas")
     
     if ALL_SERVICES_AVAILABLE:
@@ -403,14 +506,39 @@ with tabs[2]:
     else:
         st.info("Sistema de auditoria não disponível")
 
+
+with tabs[2]:
+    _tab_audit()
+
 # ===== TAB 4: ESTATÍSTICAS =====
-with tabs[3]:
+# Stats only matter at a coarse granularity; avoid DB round trips on every rerun
+STATS_TTL = 30
+
+
+@st.cache_data(ttl=STATS_TTL)
+def _vector_stats() -> dict:
+    return vector_store.get_stats()
+
+
+@st.cache_data(ttl=STATS_TTL)
+def _cache_stats() -> dict:
+    return cache_service.get_stats()
+
+
+@st.cache_data(ttl=STATS_TTL)
+def _audit_stats() -> dict:
+    return audit_logger.get_stats()
+
+
+@st.fragment
+def _tab_stats():
+    """Estatísticas tab, rerun on its own when its widgets change"""
     st.subheader("📈 Estatísticas do Sistema")
     
     if ALL_SERVICES_AVAILABLE:
         try:
             # Vector store stats
-            vs_stats = vector_store.get_stats()
+            vs_stats = _vector_stats()
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -422,38 +550,36 @@ with tabs[3]:
                 st.metric("📏 Tamanho Médio", f"{avg_size:.0f} chars")
             
             # Cache stats
-            if ALL_SERVICES_AVAILABLE:
-                st.markdown("---")
-                st.markdown("### ⚡ Cache")
-                cache_stats = cache_service.get_stats()
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Cache Usuário", cache_stats.get('user_cache_entries', 0))
-                with col2:
-                    st.metric("Cache Global", cache_stats.get('global_cache_entries', 0))
-                with col3:
-                    st.metric("Total", cache_stats.get('total_entries', 0))
+            st.markdown("---")
+            st.markdown("### ⚡ Cache")
+            cache_stats = _cache_stats()
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Cache Usuário", cache_stats.get('user_cache_entries', 0))
+            with col2:
+                st.metric("Cache Global", cache_stats.get('global_cache_entries', 0))
+            with col3:
+                st.metric("Total", cache_stats.get('total_entries', 0))
             
             # Audit stats
-            if ALL_SERVICES_AVAILABLE:
-                st.markdown("---")
-                st.markdown("### 📊 Auditoria")
-                audit_stats = audit_logger.get_stats()
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total Interações", audit_stats.get('total_interactions', 0))
-                with col2:
-                    st.metric("Usuários Únicos", audit_stats.get('unique_users', 0))
-                with col3:
-                    st.metric("Últimas 24h", audit_stats.get('last_24h', 0))
-                
-                # By role
-                if audit_stats.get('by_role'):
-                    st.markdown("**Por Role:**")
-                    for role, count in audit_stats['by_role'].items():
-                        st.caption(f"• {role}: {count}")
+            st.markdown("---")
+            st.markdown("### 📊 Auditoria")
+            audit_stats = _audit_stats()
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Interações", audit_stats.get('total_interactions', 0))
+            with col2:
+                st.metric("Usuários Únicos", audit_stats.get('unique_users', 0))
+            with col3:
+                st.metric("Últimas 24h", audit_stats.get('last_24h', 0))
+            
+            # By role
+            if audit_stats.get('by_role'):
+                st.markdown("**Por Role:**")
+                for role, count in audit_stats['by_role'].items():
+                    st.caption(f"• {role}: {count}")
             
             # Documents by type
             if vs_stats.get('documentos_por_tipo'):
@@ -466,8 +592,14 @@ with tabs[3]:
     else:
         st.info("Estatísticas não disponíveis")
 
+
+with tabs[3]:
+    _tab_stats()
+
 # ===== TAB 5: DOCUMENTAÇÃO =====
-with tabs[4]:
+@st.fragment
+def _tab_documentation():
+    """Documentação tab, rerun on its own when its widgets change"""
     try:
         from components.documentation_viewer import render_documentation_tab
         from pathlib import Path
@@ -478,8 +610,14 @@ with tabs[4]:
         st.error(f"Erro ao carregar documentação: {e}")
         st.info("Verifique se os arquivos de documentação estão no diretório raiz do projeto")
 
+
+with tabs[4]:
+    _tab_documentation()
+
 # ===== TAB 6: ADMIN =====
-with tabs[5]:
+@st.fragment
+def _tab_admin():
+    """Admin tab, rerun on its own when its widgets change"""
     try:
         from components.admin_panel import render_admin_panel
         
@@ -489,3 +627,7 @@ with tabs[5]:
         st.error(f"Erro ao carregar painel de administração: {e}")
         import traceback
         st.code(traceback.format_exc())
+
+
+with tabs[5]:
+    _tab_admin()
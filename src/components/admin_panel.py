@@ -23,13 +23,90 @@ from services.cache_service import get_cache_service
 from services.audit import get_audit_logger
 from components.env_editor import render_env_editor
 from pathlib import Path
+from datetime import datetime
+import sqlite3
 import subprocess
 import sys
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    import psutil
+    PSUTIL_SUPPORT = True
+    # Primeira leitura sem intervalo só inicia a contagem (retorna 0.0); as
+    # seguintes medem desde a anterior, sem bloquear o script
+    psutil.cpu_percent(interval=None)
+except ImportError:
+    PSUTIL_SUPPORT = False
+
+# Documentos por página nas listagens (vetorizados / uploads)
+PAGE_SIZE = 50
+UPLOAD_PAGE_SIZE = 20
+
+# Intervalo (s) entre execuções de PRAGMA optimize
+OPTIMIZE_INTERVAL = 3600
+
+# Ícone por tipo de documento vetorizado
+_ICON_MAP = {
+    "ata": "📝",
+    "pauta": "📋",
+    "resolucao": "📜",
+    "regimento": "📕",
+    "pdf": "📄"
+}
+
+
+@st.cache_resource
+def _conn(db_path: str):
+    """Conexão SQLite compartilhada pelo painel (WAL, criada uma vez por processo) e seu lock"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA optimize")
+    # A conexão é usada por todas as sessões e threads: todo acesso passa por este lock
+    return conn, threading.Lock()
+
+
+def _query(db_path: str, sql: str, params=()) -> list:
+    """Executa um comando na conexão compartilhada sob o lock e retorna todas as linhas"""
+    conn, lock = _conn(db_path)
+    with lock:
+        return conn.execute(sql, params).fetchall()
+
+
+def _maybe_optimize(db_path: str):
+    """Mantém as estatísticas do planner atualizadas (no máximo uma vez por hora por sessão)"""
+    now = time.time()
+    if now - st.session_state.get("last_optimize", 0) > OPTIMIZE_INTERVAL:
+        _query(db_path, "PRAGMA optimize")
+        st.session_state["last_optimize"] = now
+
+
+@st.cache_data(ttl=30)
+def _cached_users():
+    """Lista de usuários em cache (compartilhada entre sessões)"""
+    return list(get_user_service().list_users())
+
+
+@st.cache_data(ttl=30)
+def _users_by_name():
+    """Índice username -> usuário sobre a lista em cache"""
+    return {u.username: u for u in _cached_users()}
+
+
+def _invalidate_users():
+    """Descarta a lista de usuários em cache após uma alteração (vale para todas as sessões)"""
+    _cached_users.clear()
+    _users_by_name.clear()
 
 
 def render_user_management():
     """Renderiza gerenciamento de usuários"""
+    current_user = st.session_state.get("user_id")
     st.subheader("👥 Gerenciamento de Usuários")
     
     user_service = get_user_service()
@@ -39,32 +116,42 @@ def render_user_management():
     
     # Tab 1: Lista de usuários
     with tabs[0]:
-        users = user_service.list_users()
+        users = _cached_users()
         
         st.metric("Total de Usuários", len(users))
         
         if users:
             st.markdown("### Usuários Cadastrados")
             
-            for idx, user in enumerate(users):
-                with st.expander(f"👤 {user.username} ({user.role})"):
-                    col1, col2 = st.columns([3, 1])
-                    
-                    with col1:
-                        st.write(f"**Username**: {user.username}")
-                        st.write(f"**Role**: {user.role}")
-                    
-                    with col2:
-                        if st.button(f"🗑️ Excluir", key=f"del_{idx}"):
-                            if user.username == st.session_state.get("user_id"):
-                                st.error("❌ Você não pode excluir sua própria conta!")
-                            else:
-                                try:
-                                    user_service.delete_user(user.username)
-                                    st.success(f"✅ Usuário {user.username} excluído!")
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"❌ Erro: {e}")
+            st.dataframe(
+                [{"Username": u.username, "Role": u.role} for u in users],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            # Ações apenas para o usuário selecionado
+            by_name = _users_by_name()
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                del_username = st.selectbox(
+                    "Usuário para excluir",
+                    options=list(by_name),
+                    format_func=lambda name: f"👤 {name} ({by_name[name].role})",
+                    key="admin_del_user_select"
+                )
+            with col2:
+                st.write("")
+                if st.button("🗑️ Excluir", key="admin_del_user", use_container_width=True):
+                    if del_username == current_user:
+                        st.error("❌ Você não pode excluir sua própria conta!")
+                    else:
+                        try:
+                            user_service.delete_user(del_username)
+                            _invalidate_users()
+                            st.success(f"✅ Usuário {del_username} excluído!")
+                            st.rerun(scope="fragment")
+                        except Exception as e:
+                            st.error(f"❌ Erro: {e}")
         else:
             st.info("Nenhum usuário cadastrado")
     
@@ -100,6 +187,7 @@ def render_user_management():
                             password=new_password,
                             role=new_role
                         )
+                        _invalidate_users()
                         st.success(f"✅ Usuário {new_username} criado com sucesso!")
                         st.balloons()
                     except Exception as e:
@@ -109,14 +197,14 @@ def render_user_management():
     with tabs[2]:
         st.markdown("### Editar Usuário")
         
-        users = user_service.list_users()
-        if users:
+        by_name = _users_by_name()
+        if by_name:
             selected_user = st.selectbox(
                 "Selecione um usuário",
-                options=[u.username for u in users]
+                options=list(by_name)
             )
             
-            user = next(u for u in users if u.username == selected_user)
+            user = by_name[selected_user]
             
             with st.form("edit_user_form"):
                 new_role = st.selectbox(
@@ -142,12 +230,41 @@ def render_user_management():
                             else:
                                 user_service.reset_password(user.username, new_password)
                         
+                        _invalidate_users()
                         st.success("✅ Usuário atualizado com sucesso!")
-                        st.rerun()
+                        st.rerun(scope="fragment")
                     except Exception as e:
                         st.error(f"❌ Erro: {e}")
 
 
+@st.cache_data(ttl=10, show_spinner=False)
+def _list_backups(backup_dir: str, mtime_ns: int):
+    """Nomes dos backups (.db), mais recentes primeiro; mtime_ns invalida o cache"""
+    with os.scandir(backup_dir) as it:
+        return sorted((e.name for e in it if e.name.endswith(".db") and e.is_file()), reverse=True)
+
+
+@st.cache_resource
+def _stats_executor() -> ThreadPoolExecutor:
+    """Pool dedicado às leituras de estatísticas (não concorre com uploads)"""
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="secs-stats")
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _combined_stats():
+    """Estatísticas de vetores, cache e uploads numa única leitura em cache"""
+    from services.document_manager import get_document_manager
+    
+    # As três leituras são independentes: sobrepor a espera de I/O
+    sources = {
+        "vector": get_vector_store().get_stats,
+        "cache": get_cache_service().get_stats,
+        "docs": get_document_manager().get_stats,
+    }
+    futures = {key: _stats_executor().submit(fn) for key, fn in sources.items()}
+    return {key: fut.result() for key, fut in futures.items()}
+
+
 def render_database_controls():
     """Renderiza controles do banco de dados"""
     st.subheader("🗄️ Controle do Banco de Dados")
@@ -156,17 +273,15 @@ def render_database_controls():
     col1, col2, col3 = st.columns(3)
     
     try:
-        vector_store = get_vector_store()
-        stats = vector_store.get_stats()
+        combined = _combined_stats()
+        stats = combined["vector"]
         
         with col1:
             st.metric("📄 Documentos", stats.get('num_documentos', 0))
         with col2:
             st.metric("📚 Chunks", stats.get('num_chunks', 0))
         with col3:
-            cache_service = get_cache_service()
-            cache_stats = cache_service.get_stats()
-            st.metric("⚡ Cache", cache_stats.get('total_entries', 0))
+            st.metric("⚡ Cache", combined["cache"].get('total_entries', 0))
     except:
         st.warning("Não foi possível carregar estatísticas")
     
@@ -180,16 +295,28 @@ def render_database_controls():
         
         if st.button("📦 Criar Backup Agora", use_container_width=True):
             try:
-                from datetime import datetime
-                import shutil
-                
                 backup_dir = Path("data/backups")
                 backup_dir.mkdir(parents=True, exist_ok=True)
                 
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 backup_path = backup_dir / f"app_backup_{timestamp}.db"
                 
-                shutil.copy2("data/app.db", backup_path)
+                # API de backup online: cópia consistente mesmo com escritas em andamento
+                progress_bar = st.progress(0.0, text="Copiando banco de dados...")
+                
+                def _progress(status, remaining, total):
+                    if total:
+                        progress_bar.progress((total - remaining) / total)
+                
+                src = sqlite3.connect("data/app.db")
+                dst = sqlite3.connect(str(backup_path))
+                try:
+                    with dst:
+                        src.backup(dst, pages=1024, progress=_progress)
+                finally:
+                    src.close()
+                    dst.close()
+                progress_bar.empty()
                 
                 st.success(f"✅ Backup criado: {backup_path}")
             except Exception as e:
@@ -198,17 +325,24 @@ def render_database_controls():
         # Listar backups
         backup_dir = Path("data/backups")
         if backup_dir.exists():
-            backups = sorted(backup_dir.glob("*.db"), reverse=True)
+            backups = _list_backups(str(backup_dir), os.stat(backup_dir).st_mtime_ns)
             if backups:
                 st.caption(f"📁 {len(backups)} backup(s) disponível(is)")
                 selected_backup = st.selectbox(
                     "Restaurar backup",
-                    options=[b.name for b in backups[:10]]
+                    options=backups[:10]
                 )
     
     with col2:
         st.markdown("### 🧹 Limpeza")
         
+        if get_audit_logger().legacy_timestamps:
+            st.warning(
+                "⚠️ A tabela de auditoria ainda usa datas em texto (formato antigo). "
+                "Pare o app e execute `./run.sh migrate-audit` "
+                "(ou `python scripts/migrate_audit_timestamps.py`) para convertê-la."
+            )
+        
         if st.button("🗑️ Limpar Cache", use_container_width=True):
             try:
                 cache_service = get_cache_service()
@@ -226,6 +360,35 @@ def render_database_controls():
                 st.error(f"❌ Erro: {e}")
 
 
+@st.cache_data(ttl=5, show_spinner=False)
+def _tail_lines(path: str, mtime_ns: int, num_lines: int, block_size: int = 65536):
+    """
+    Retorna as últimas num_lines linhas do arquivo lendo blocos a partir do fim.
+    
+    mtime_ns faz parte da chave do cache para invalidar quando o log muda.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        
+        # Lê blocos de trás para frente até ter linhas suficientes
+        while pos > 0 and data.count(b'\n') <= num_lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return lines[-num_lines:]
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _system_metrics():
+    """Amostra CPU e RAM (reutilizada por reruns dentro do TTL)"""
+    return psutil.cpu_percent(interval=None), psutil.virtual_memory().percent
+
+
 def render_app_controls():
     """Renderiza controles da aplicação"""
     st.subheader("🎛️ Controle da Aplicação")
@@ -237,15 +400,13 @@ def render_app_controls():
         st.metric("🟢 Status", "Online")
     
     # Try to get system metrics
-    try:
-        import psutil
+    if PSUTIL_SUPPORT:
+        cpu, mem_percent = _system_metrics()
         with col2:
-            cpu = psutil.cpu_percent()
             st.metric("💻 CPU", f"{cpu}%")
         with col3:
-            mem = psutil.virtual_memory()
-            st.metric("🧠 RAM", f"{mem.percent}%")
-    except ImportError:
+            st.metric("🧠 RAM", f"{mem_percent}%")
+    else:
         with col2:
             st.metric("💻 CPU", "N/A")
         with col3:
@@ -269,7 +430,7 @@ def render_app_controls():
     """)
     
     if st.button("⟳ Recarregar Página", type="primary", use_container_width=True):
-        st.rerun()
+        st.rerun(scope="fragment")
     
     st.markdown("---")
     
@@ -282,10 +443,8 @@ def render_app_controls():
         
         if st.button("📄 Ver Logs"):
             try:
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    last_lines = lines[-num_lines:]
-                    st.code(''.join(last_lines), language='log')
+                last_lines = _tail_lines(str(log_file), log_file.stat().st_mtime_ns, num_lines)
+                st.code(''.join(last_lines), language='log')
             except Exception as e:
                 st.error(f"❌ Erro ao ler logs: {e}")
     else:
@@ -323,19 +482,125 @@ def render_admin_panel():
         render_app_controls()
 
 
+@st.cache_data(ttl=60)
+def _load_vectorized_docs(db_path: str, tipo: Optional[str] = None, page: int = 1):
+    """Carrega uma página de documentos vetorizados e a contagem de chunks de cada um"""
+    where, params = ("WHERE tipo = ?", [tipo]) if tipo else ("", [])
+    docs = _query(db_path, f"""
+        SELECT id, tipo, titulo, numero, data, conselho, caminho, criado_em
+        FROM documentos
+        {where}
+        ORDER BY criado_em DESC
+        LIMIT ? OFFSET ?
+    """, params + [PAGE_SIZE, (page - 1) * PAGE_SIZE])
+    
+    # Contagem de chunks só para os documentos da página (usa idx_chunks_documento)
+    ids = [doc[0] for doc in docs]
+    chunk_counts = {}
+    if ids:
+        placeholders = ",".join("?" * len(ids))
+        chunk_counts = dict(_query(
+            db_path,
+            f"SELECT documento_id, COUNT(*) FROM chunks "
+            f"WHERE documento_id IN ({placeholders}) GROUP BY documento_id",
+            ids
+        ))
+    
+    return docs, chunk_counts
+
+
+@st.cache_data(ttl=30)
+def _tipo_counts(db_path: str):
+    """Contagem de documentos vetorizados por tipo (agregada no SQLite)"""
+    return _query(db_path, "SELECT tipo, COUNT(*) FROM documentos GROUP BY tipo ORDER BY tipo")
+
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Pool para processamento de documentos fora da thread do script"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="secs-admin")
+
+
+def _invalidate_documents():
+    """Descarta estatísticas e listagens de documentos em cache após exclusão ou indexação"""
+    _combined_stats.clear()
+    _load_vectorized_docs.clear()
+    _tipo_counts.clear()
+
+
+def _process_and_index(doc_id: int, filename: str, original_name: str) -> int:
+    """Extrai, vetoriza e indexa um PDF global; retorna o número de chunks"""
+    from utils.pdf_processor import process_document
+    from utils.vector_store_helper import add_chunks_to_vector_store
+    from services.document_manager import get_document_manager
+    
+    doc_path = Path("data/documents/global") / filename
+    chunks_data = process_document(str(doc_path))
+    
+    # Preparar chunks com metadata
+    chunks_with_metadata = [
+        {
+            "text": chunk["text"],
+            "page": chunk.get("page", 0),
+            "metadata": {
+                "source": original_name,
+                "doc_id": doc_id,
+                "is_global": True
+            }
+        }
+        for chunk in chunks_data
+    ]
+    
+    # Adicionar ao vector store
+    add_chunks_to_vector_store(chunks_with_metadata)
+    
+    get_document_manager().update_document_status(
+        doc_id,
+        status="processed",
+        processed=True,
+        num_chunks=len(chunks_data)
+    )
+    
+    return len(chunks_data)
+
+
+@st.fragment(run_every=1.0)
+def _render_index_jobs(jobs: dict):
+    """Status dos processamentos em segundo plano, reexecutado sozinho a cada segundo"""
+    finished = []
+    for job_id, (name, fut) in list(jobs.items()):
+        if not fut.done():
+            st.info(f"⏳ Processando {name}...")
+            continue
+        
+        del jobs[job_id]
+        try:
+            finished.append(f"✅ {name} processado! {fut.result()} chunks criados.")
+        except Exception as e:
+            finished.append(f"❌ Erro ao processar {name}: {e}")
+    
+    if finished:
+        _invalidate_documents()
+        # Uma única execução completa para atualizar métricas e listagens
+        st.session_state.setdefault("admin_index_done", []).extend(finished)
+        st.rerun()
+
+
 def render_document_management():
     """Renderiza gerenciamento de documentos"""
     from services.document_manager import get_document_manager
-    from services.vector_store import get_vector_store
     
     st.subheader("📚 Gerenciamento de Documentos")
     
+    uid = st.session_state.get("user_id", "admin")
     doc_manager = get_document_manager()
     vector_store = get_vector_store()
+    _maybe_optimize(str(doc_manager.db_path))
     
     # Estatísticas combinadas
-    upload_stats = doc_manager.get_stats()
-    vector_stats = vector_store.get_stats()
+    combined = _combined_stats()
+    upload_stats = combined["docs"]
+    vector_stats = combined["vector"]
     
     # Combinar estatísticas
     col1, col2, col3, col4 = st.columns(4)
@@ -365,61 +630,34 @@ def render_document_management():
         key="admin_upload"
     )
     
+    jobs = st.session_state.setdefault("admin_index_jobs", {})
+    
     if uploaded_file and st.button("📤 Fazer Upload Global", type="primary"):
         with st.spinner("Fazendo upload..."):
             doc = doc_manager.upload_document(
                 file=uploaded_file,
                 original_name=uploaded_file.name,
-                user_id=st.session_state.get("user_id", "admin"),
+                user_id=uid,
                 is_global=True
             )
             
             if doc:
                 st.success(f"✅ Documento global criado! ID: {doc.id}")
                 
-                # Processar
-                with st.spinner("Processando..."):
-                    try:
-                        from pathlib import Path
-                        from utils.pdf_processor import process_document
-                        from services.vector_store import get_vector_store
-                        
-                        doc_path = Path("data/documents/global") / doc.filename
-                        chunks_data = process_document(str(doc_path))
-                        
-                        # Preparar chunks com metadata
-                        chunks_with_metadata = [
-                            {
-                                "text": chunk["text"],
-                                "page": chunk.get("page", 0),
-                                "metadata": {
-                                    "source": doc.original_name,
-                                    "doc_id": doc.id,
-                                    "is_global": True
-                                }
-                            }
-                            for chunk in chunks_data
-                        ]
-                        
-                        # Adicionar ao vector store
-                        from utils.vector_store_helper import add_chunks_to_vector_store
-                        add_chunks_to_vector_store(chunks_with_metadata)
-                        
-                        doc_manager.update_document_status(
-                            doc.id,
-                            status="processed",
-                            processed=True,
-                            num_chunks=len(chunks_data)
-                        )
-                        
-                        st.success(f"✅ Processado! {len(chunks_data)} chunks criados.")
-                        st.balloons()
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Erro ao processar: {e}")
+                # Processar em segundo plano (não bloqueia a thread do script)
+                jobs[doc.id] = (
+                    doc.original_name,
+                    _executor().submit(_process_and_index, doc.id, doc.filename, doc.original_name)
+                )
             else:
                 st.error("❌ Erro ao fazer upload")
     
+    # Acompanhar processamentos em andamento
+    if jobs:
+        _render_index_jobs(jobs)
+    for message in st.session_state.pop("admin_index_done", []):
+        (st.success if message.startswith("✅") else st.error)(message)
+    
     st.markdown("---")
     
     # Lista de todos os documentos
@@ -430,133 +668,142 @@ def render_document_management():
     
     # Tab 1: Documentos via upload
     with doc_tabs[0]:
-        all_docs = doc_manager.list_all_documents()
-        
         # Filtro
         filter_type = st.selectbox(
             "Filtrar por tipo",
             ["Todos", "Globais", "Por Usuário"],
             key="filter_uploads"
         )
+        filter_global = {"Globais": True, "Por Usuário": False}.get(filter_type)
         
-        if filter_type == "Globais":
-            filtered_docs = [d for d in all_docs if d.is_global]
-        elif filter_type == "Por Usuário":
-            filtered_docs = [d for d in all_docs if not d.is_global]
-        else:
-            filtered_docs = all_docs
+        # Totais já vêm das estatísticas em cache
+        total_uploads = upload_stats["total_documents"]
+        if filter_global is True:
+            total_uploads = upload_stats["global_documents"]
+        elif filter_global is False:
+            total_uploads -= upload_stats["global_documents"]
+        
+        num_pages = max(1, (total_uploads + UPLOAD_PAGE_SIZE - 1) // UPLOAD_PAGE_SIZE)
+        upload_page = 1
+        if num_pages > 1:
+            upload_page = st.selectbox(
+                "Página",
+                options=range(1, num_pages + 1),
+                format_func=lambda p: f"{p} de {num_pages}",
+                key="uploads_page"
+            )
+        
+        # Filtro e paginação no SQL: só a página exibida é lida
+        shown_docs = doc_manager.list_all_documents(
+            filter_global=filter_global,
+            limit=UPLOAD_PAGE_SIZE,
+            offset=(upload_page - 1) * UPLOAD_PAGE_SIZE
+        )
         
-        st.caption(f"Mostrando {len(filtered_docs)} documento(s) via upload")
+        st.caption(f"Mostrando {len(shown_docs)} de {total_uploads} documento(s) via upload")
         
-        if not filtered_docs:
+        if not shown_docs:
             st.info("Nenhum documento enviado via interface ainda")
         
-        for doc in filtered_docs[:20]:  # Limitar a 20
-            with st.expander(f"{'🌐' if doc.is_global else '👤'} {doc.original_name} - {doc.user_id}"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.write(f"**ID**: {doc.id}")
-                    st.write(f"**Usuário**: {doc.user_id}")
-                    st.write(f"**Tipo**: {'Global' if doc.is_global else 'Pessoal'}")
-                    st.write(f"**Tamanho**: {doc.file_size / 1024:.1f} KB")
-                    st.write(f"**Upload**: {doc.upload_date[:19]}")
-                    st.write(f"**Status**: {'✅ Processado' if doc.processed else '⏳ ' + doc.status}")
-                    if doc.processed:
-                        st.write(f"**Chunks**: {doc.num_chunks}")
-                
-                with col2:
-                    if st.button("🗑️ Excluir", key=f"admin_del_{doc.id}"):
-                        if doc_manager.delete_document(doc.id, st.session_state.get("user_id"), is_admin=True):
-                            st.success("✅ Excluído!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Erro")
+        if shown_docs:
+            st.dataframe(
+                [
+                    {
+                        "ID": doc.id,
+                        "Documento": f"{'🌐' if doc.is_global else '👤'} {doc.original_name}",
+                        "Usuário": doc.user_id,
+                        "Tipo": "Global" if doc.is_global else "Pessoal",
+                        "Tamanho (KB)": round(doc.file_size / 1024, 1),
+                        "Upload": doc.upload_date[:19],
+                        "Status": "✅ Processado" if doc.processed else "⏳ " + doc.status,
+                        "Chunks": doc.num_chunks if doc.processed else None,
+                    }
+                    for doc in shown_docs
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            # Ação única fora da tabela
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                docs_by_id = {doc.id: doc for doc in shown_docs}
+                del_id = st.selectbox(
+                    "Documento para excluir",
+                    options=list(docs_by_id),
+                    format_func=lambda i: f"{i} - {docs_by_id[i].original_name}",
+                    key="admin_del_select"
+                )
+            with col2:
+                st.write("")
+                if st.button("🗑️ Excluir", key="admin_del_upload", use_container_width=True):
+                    if doc_manager.delete_document(del_id, uid, is_admin=True):
+                        _invalidate_documents()
+                        st.success("✅ Excluído!")
+                        st.rerun(scope="fragment")
+                    else:
+                        st.error("❌ Erro")
     
     # Tab 2: Documentos vetorizados
     with doc_tabs[1]:
-        import sqlite3
-        
-        conn = sqlite3.connect(doc_manager.db_path)
-        cursor = conn.execute("""
-            SELECT id, tipo, titulo, numero, data, conselho, caminho, criado_em
-            FROM documentos
-            ORDER BY criado_em DESC
-        """)
-        vectorized_docs = cursor.fetchall()
-        conn.close()
+        tipo_counts = _tipo_counts(str(doc_manager.db_path))
         
         # Filtro por tipo
-        tipos_disponiveis = list(set([doc[1] for doc in vectorized_docs]))
         filter_tipo = st.selectbox(
             "Filtrar por tipo",
-            ["Todos"] + sorted(tipos_disponiveis),
+            ["Todos"] + [tipo for tipo, _ in tipo_counts],
             key="filter_vectorized"
         )
+        tipo = None if filter_tipo == "Todos" else filter_tipo
         
-        if filter_tipo != "Todos":
-            filtered_vectorized = [d for d in vectorized_docs if d[1] == filter_tipo]
-        else:
-            filtered_vectorized = vectorized_docs
+        # Total vem da contagem por tipo já em cache; só a página é lida
+        total = sum(count for t, count in tipo_counts if tipo is None or t == tipo)
+        num_pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+        page = 1
+        if num_pages > 1:
+            page = st.selectbox(
+                "Página",
+                options=range(1, num_pages + 1),
+                format_func=lambda p: f"{p} de {num_pages}",
+                key="vectorized_page"
+            )
+        
+        shown_vectorized, chunk_counts = _load_vectorized_docs(
+            str(doc_manager.db_path), tipo, page
+        )
         
-        st.caption(f"Mostrando {len(filtered_vectorized)} documento(s) vetorizado(s)")
+        st.caption(f"Mostrando {len(shown_vectorized)} de {total} documento(s) vetorizado(s)")
         
         # Estatísticas por tipo
-        if vectorized_docs:
-            tipo_counts = {}
-            for doc in vectorized_docs:
-                tipo = doc[1]
-                tipo_counts[tipo] = tipo_counts.get(tipo, 0) + 1
-            
+        if tipo_counts:
             st.markdown("**Documentos por tipo:**")
             cols = st.columns(len(tipo_counts))
-            for idx, (tipo, count) in enumerate(sorted(tipo_counts.items())):
+            for idx, (tipo, count) in enumerate(tipo_counts):
                 with cols[idx]:
                     st.metric(tipo.capitalize(), count)
         
         st.markdown("---")
         
         # Listar documentos
-        for doc in filtered_vectorized[:50]:  # Limitar a 50
-            doc_id, tipo, titulo, numero, data, conselho, caminho, criado_em = doc
-            
-            # Ícone por tipo
-            icon_map = {
-                "ata": "📝",
-                "pauta": "📋",
-                "resolucao": "📜",
-                "regimento": "📕",
-                "pdf": "📄"
-            }
-            icon = icon_map.get(tipo, "📄")
-            
-            with st.expander(f"{icon} {titulo} ({tipo})"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.write(f"**ID**: {doc_id}")
-                    st.write(f"**Tipo**: {tipo}")
-                    st.write(f"**Título**: {titulo}")
-                    if numero:
-                        st.write(f"**Número**: {numero}")
-                    if data:
-                        st.write(f"**Data**: {data}")
-                    if conselho:
-                        st.write(f"**Conselho**: {conselho}")
-                    st.write(f"**Caminho**: {caminho}")
-                    st.write(f"**Processado em**: {criado_em[:19] if criado_em else 'N/A'}")
+        if shown_vectorized:
+            rows = []
+            for doc_id, tipo, titulo, numero, data, conselho, caminho, criado_em in shown_vectorized:
+                icon = _ICON_MAP.get(tipo, "📄")
                 
-                with col2:
-                    st.caption("Vetorizado via run.sh")
-                    # Contar chunks
-                    conn = sqlite3.connect(doc_manager.db_path)
-                    cursor = conn.execute(
-                        "SELECT COUNT(*) FROM chunks WHERE documento_id = ?",
-                        (doc_id,)
-                    )
-                    num_chunks = cursor.fetchone()[0]
-                    conn.close()
-                    st.metric("Chunks", num_chunks)
+                rows.append({
+                    "ID": doc_id,
+                    "Título": f"{icon} {titulo}",
+                    "Tipo": tipo,
+                    "Número": numero,
+                    "Data": data,
+                    "Conselho": conselho,
+                    "Caminho": caminho,
+                    "Processado em": criado_em[:19] if criado_em else "N/A",
+                    "Chunks": chunk_counts.get(doc_id, 0),
+                })
+            
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            st.caption("Vetorizados via run.sh")
     
     st.markdown("---")
     
@@ -583,7 +830,7 @@ def render_document_management():
                 if st.button("💾 Atualizar Quota", key=f"update_quota_{user_id}"):
                     doc_manager.update_user_quota(user_id, new_quota)
                     st.success(f"✅ Quota de {user_id} atualizada para {new_quota} MB!")
-                    st.rerun()
+                    st.rerun(scope="fragment")
     else:
         st.info("Nenhum usuário com documentos ainda")
 
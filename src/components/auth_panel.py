@@ -30,18 +30,16 @@ def auth_panel(user_service: UserService) -> bool:
     Returns:
         True if user is authenticated, False otherwise
     """
-    # Initialize session state
-    if "user_id" not in st.session_state:
-        st.session_state.user_id = "anon"
-    if "role" not in st.session_state:
-        st.session_state.role = "publico"
-    if "is_authenticated" not in st.session_state:
-        st.session_state.is_authenticated = False
+    # Initialize session state (read once; the proxy lookups are not free)
+    state = st.session_state
+    user_id = state.setdefault("user_id", "anon")
+    role = state.setdefault("role", "publico")
+    is_authenticated = state.setdefault("is_authenticated", False)
     
     with st.sidebar:
         st.markdown("---")
         
-        if not st.session_state.is_authenticated:
+        if not is_authenticated:
             # Login form
             st.subheader("🔐 Login")
             
@@ -88,8 +86,8 @@ def auth_panel(user_service: UserService) -> bool:
         
         else:
             # Logged in - show user info
-            st.success(f"👤 **{st.session_state.user_id}**")
-            st.caption(f"Perfil: {st.session_state.role}")
+            st.success(f"👤 **{user_id}**")
+            st.caption(f"Perfil: {role}")
             
             if st.button("🚪 Sair", use_container_width=True):
                 st.session_state.user_id = "anon"
@@ -18,9 +18,145 @@ Compatibilidade: Python 3.11+
 
 import streamlit as st
 import sqlite3
+import threading
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Tuple
 from services.document_manager import get_document_manager
 
 
+@st.cache_resource
+def get_db(db_path: str = "data/app.db") -> Tuple[sqlite3.Connection, threading.Lock]:
+    """Conexão SQLite compartilhada entre reruns (WAL, criada uma vez por processo) e seu lock"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-20000")
+    # A conexão é usada por todas as sessões e threads: toda consulta e transação passa por este lock
+    return conn, threading.Lock()
+
+
+# Comandos fixos: o mesmo texto SQL reaproveita o statement já preparado
+# no cache da conexão em vez de ser reanalisado a cada clique
+METRICS_SQL = """
+    SELECT COUNT(*),
+           COALESCE(SUM(is_global = 1), 0),
+           COALESCE(SUM(processed = 1), 0),
+           COALESCE(SUM(file_size), 0)
+    FROM documents
+"""
+PER_USER_SQL = """
+    SELECT user_id, id, original_name, is_global, processed, num_chunks, file_size, upload_date
+    FROM documents
+    ORDER BY user_id, upload_date DESC
+"""
+SET_DOCUMENT_GLOBAL_SQL = "UPDATE documents SET is_global = ? WHERE id = ?"
+SET_DOCUMENTO_GLOBAL_SQL = """
+    UPDATE documentos SET is_global = ?
+    WHERE id = (SELECT documento_id FROM documents WHERE id = ?)
+"""
+SET_ALL_DOCUMENTS_GLOBAL_SQL = "UPDATE documents SET is_global = ?"
+SET_ALL_DOCUMENTOS_GLOBAL_SQL = "UPDATE documentos SET is_global = ?"
+
+
+def set_all_documents_global(is_global: bool):
+    """Altera a permissão de todos os documentos numa única transação"""
+    conn, lock = get_db()
+    with lock:
+        with conn:
+            # Reserva a escrita já no início: as duas tabelas mudam juntas
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(SET_ALL_DOCUMENTS_GLOBAL_SQL, (is_global,))
+            conn.execute(SET_ALL_DOCUMENTOS_GLOBAL_SQL, (is_global,))
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    _cached_search.clear()
+
+
+def set_documents_global(changes: List[Tuple[bool, int]]):
+    """Aplica várias alterações (is_global, id) numa única transação"""
+    conn, lock = get_db()
+    with lock, conn:
+        conn.executemany(SET_DOCUMENT_GLOBAL_SQL, changes)
+        conn.executemany(SET_DOCUMENTO_GLOBAL_SQL, changes)
+    _cached_search.clear()
+
+
+# Cláusulas do filtro da busca (tabela documents com alias d)
+_SEARCH_FILTERS = {
+    "Globais": "d.is_global = 1",
+    "Privados": "d.is_global = 0",
+    "Processados": "d.processed = 1",
+    "Pendentes": "d.processed = 0",
+}
+
+
+def _fts_query(search_term: str) -> str:
+    """Converte o texto digitado numa consulta FTS5 de prefixos ("termo"*)"""
+    return " ".join(f'"{word.replace(chr(34), "")}"*' for word in search_term.split())
+
+
+def search_documents(search_term: str, filter_type: str, limit: int = 50):
+    """Busca documentos por nome (FTS5, com LIKE como fallback) e filtro"""
+    conn, lock = get_db()
+    
+    clauses, params = [], []
+    if filter_type in _SEARCH_FILTERS:
+        clauses.append(_SEARCH_FILTERS[filter_type])
+    
+    select = "SELECT d.id, d.original_name, d.user_id, d.is_global, d.processed, d.num_chunks"
+    order = " ORDER BY d.upload_date DESC LIMIT ?"
+    
+    if search_term.strip():
+        where = " AND ".join(["documents_fts MATCH ?"] + clauses)
+        try:
+            with lock:
+                return conn.execute(
+                    f"{select} FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                    f"WHERE {where}{order}",
+                    [_fts_query(search_term)] + params + [limit]
+                ).fetchall()
+        except sqlite3.OperationalError:
+            # Sem documents_fts (SQLite sem FTS5): varredura com LIKE
+            clauses.append("d.original_name LIKE ?")
+            params.append(f"%{search_term}%")
+    
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    with lock:
+        return conn.execute(
+            f"{select} FROM documents d{where}{order}", params + [limit]
+        ).fetchall()
+
+
+def permission_editor(rows: List[Dict], key: str, editable: bool = True) -> List[Tuple[bool, int]]:
+    """
+    Tabela única de documentos com a coluna "Global" editável
+    
+    Returns:
+        Lista de (is_global, id) das linhas alteradas pelo usuário
+    """
+    edited = st.data_editor(
+        rows,
+        column_config={
+            "Global": st.column_config.CheckboxColumn("🌍 Global", help="Marque para tornar global")
+        },
+        disabled=[col for col in rows[0] if col != "Global"] if editable else True,
+        hide_index=True,
+        use_container_width=True,
+        key=key
+    )
+    return [
+        (row["Global"], row["ID"])
+        for row, original in zip(edited, rows)
+        if row["Global"] != original["Global"]
+    ]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_search(search_term: str, filter_type: str):
+    """Resultados da busca em cache; limpo a cada alteração de documentos"""
+    return search_documents(search_term, filter_type)
+
+
 def render_document_permissions_panel():
     """Painel completo de gerenciamento de documentos e permissões"""
     
@@ -33,35 +169,22 @@ def render_document_permissions_panel():
     # Estatísticas Gerais
     st.markdown("### 📊 Estatísticas Gerais")
     
-    conn = sqlite3.connect("data/app.db")
-    
-    # Métricas
-    cursor = conn.execute("SELECT COUNT(*) FROM documents")
-    total_docs = cursor.fetchone()[0]
-    
-    cursor = conn.execute("SELECT COUNT(*) FROM documents WHERE is_global = 1")
-    global_docs = cursor.fetchone()[0]
+    conn, lock = get_db()
     
-    cursor = conn.execute("SELECT COUNT(*) FROM documents WHERE is_global = 0")
-    private_docs = cursor.fetchone()[0]
-    
-    cursor = conn.execute("SELECT COUNT(*) FROM documents WHERE processed = 1")
-    processed_docs = cursor.fetchone()[0]
-    
-    cursor = conn.execute("SELECT SUM(file_size) FROM documents")
-    total_size = cursor.fetchone()[0] or 0
+    with lock:
+        # Métricas (uma única varredura)
+        total_docs, global_docs, processed_docs, total_size = conn.execute(METRICS_SQL).fetchone()
+        # Documentos de todos os usuários numa só consulta
+        per_user = conn.execute(PER_USER_SQL).fetchall()
+    private_docs = total_docs - global_docs
     total_mb = total_size / (1024 * 1024)
     
-    # Documentos por usuário
-    cursor = conn.execute("""
-        SELECT user_id, COUNT(*), SUM(file_size)
-        FROM documents
-        GROUP BY user_id
-        ORDER BY COUNT(*) DESC
-    """)
-    docs_by_user = cursor.fetchall()
-    
-    conn.close()
+    # Agrupados por usuário
+    docs_by_user = [
+        (user_id, [row[1:] for row in rows])
+        for user_id, rows in groupby(per_user, key=itemgetter(0))
+    ]
+    docs_by_user.sort(key=lambda item: len(item[1]), reverse=True)
     
     # Mostrar métricas
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -82,60 +205,47 @@ def render_document_permissions_panel():
     # Documentos por usuário
     st.markdown("### 👥 Documentos por Usuário")
     
-    for user_id, count, size in docs_by_user:
-        size_mb = (size or 0) / (1024 * 1024)
-        with st.expander(f"👤 {user_id} - {count} documento(s) ({size_mb:.1f} MB)"):
-            # Listar documentos do usuário
-            conn = sqlite3.connect("data/app.db")
-            cursor = conn.execute("""
-                SELECT id, original_name, is_global, processed, num_chunks, file_size, upload_date
-                FROM documents
-                WHERE user_id = ?
-                ORDER BY upload_date DESC
-            """, (user_id,))
+    for user_id, user_docs in docs_by_user:
+        size_mb = sum(doc[5] or 0 for doc in user_docs) / (1024 * 1024)
+        with st.expander(f"👤 {user_id} - {len(user_docs)} documento(s) ({size_mb:.1f} MB)"):
+            rows = [
+                {
+                    "ID": doc_id,
+                    "Documento": name,
+                    "Status": "✅" if processed else "⏳",
+                    "Tamanho (KB)": round(fsize / 1024, 1),
+                    "Chunks": chunks,
+                    "Upload": upload_date[:10],
+                    "Global": bool(is_global),
+                }
+                for doc_id, name, is_global, processed, chunks, fsize, upload_date in user_docs
+            ]
             
-            user_docs = cursor.fetchall()
-            conn.close()
+            editor_key = f"perm_editor_{user_id}"
+            changes = permission_editor(rows, key=editor_key)
+            if changes:
+                set_documents_global(changes)
+                st.session_state.pop(editor_key, None)
+                st.success("✅ Atualizado!")
+                st.rerun()
             
-            for doc_id, name, is_global, processed, chunks, fsize, upload_date in user_docs:
-                permission_badge = "🌍 Global" if is_global else "🔒 Privado"
-                status_icon = "✅" if processed else "⏳"
-                
-                col1, col2, col3 = st.columns([3, 1, 1])
-                
-                with col1:
-                    st.caption(f"{status_icon} {permission_badge} | {name}")
-                    st.caption(f"   {fsize/1024:.1f} KB | {chunks} chunks | {upload_date[:10]}")
-                
-                with col2:
-                    # Toggle permissão
-                    new_is_global = st.toggle(
-                        "Global",
-                        value=bool(is_global),
-                        key=f"perm_{doc_id}",
-                        help="Marque para tornar global"
-                    )
-                    
-                    if new_is_global != bool(is_global):
-                        conn = sqlite3.connect("data/app.db")
-                        conn.execute(
-                            "UPDATE documents SET is_global = ? WHERE id = ?",
-                            (new_is_global, doc_id)
-                        )
-                        conn.execute(
-                            "UPDATE documentos SET is_global = ? WHERE user_id = ? AND titulo LIKE ?",
-                            (new_is_global, user_id, f"%{name.replace('.pdf', '')}%")
-                        )
-                        conn.commit()
-                        conn.close()
-                        st.success("✅ Atualizado!")
+            # Ação única fora da tabela
+            names = {row["ID"]: row["Documento"] for row in rows}
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                del_id = st.selectbox(
+                    "Documento para excluir",
+                    options=list(names),
+                    format_func=lambda i: f"{i} - {names[i]}",
+                    key=f"perm_del_select_{user_id}"
+                )
+            with col2:
+                st.write("")
+                if st.button("🗑️ Excluir", key=f"del_admin_{user_id}", help="Excluir documento"):
+                    if doc_manager.delete_document(del_id, user_id, is_admin=True):
+                        _cached_search.clear()
+                        st.success("✅ Excluído!")
                         st.rerun()
-                
-                with col3:
-                    if st.button("🗑️", key=f"del_admin_{doc_id}", help="Excluir documento"):
-                        if doc_manager.delete_document(doc_id, user_id, is_admin=True):
-                            st.success("✅ Excluído!")
-                            st.rerun()
     
     st.markdown("---")
     
@@ -146,21 +256,13 @@ def render_document_permissions_panel():
     
     with col1:
         if st.button("🌍 Tornar Todos Globais", help="Torna TODOS os documentos visíveis para todos"):
-            conn = sqlite3.connect("data/app.db")
-            conn.execute("UPDATE documents SET is_global = 1")
-            conn.execute("UPDATE documentos SET is_global = 1")
-            conn.commit()
-            conn.close()
+            set_all_documents_global(True)
             st.success("✅ Todos os documentos agora são globais!")
             st.rerun()
     
     with col2:
         if st.button("🔒 Tornar Todos Privados", help="Torna TODOS os documentos privados"):
-            conn = sqlite3.connect("data/app.db")
-            conn.execute("UPDATE documents SET is_global = 0")
-            conn.execute("UPDATE documentos SET is_global = 0")
-            conn.commit()
-            conn.close()
+            set_all_documents_global(False)
             st.success("✅ Todos os documentos agora são privados!")
             st.rerun()
     
@@ -169,49 +271,45 @@ def render_document_permissions_panel():
     # Filtros e Busca
     st.markdown("### 🔍 Buscar e Filtrar Documentos")
     
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        search_term = st.text_input("Buscar por nome", placeholder="Digite parte do nome do arquivo...")
-    
-    with col2:
-        filter_type = st.selectbox(
-            "Filtrar por",
-            ["Todos", "Globais", "Privados", "Processados", "Pendentes"]
-        )
-    
-    if search_term or filter_type != "Todos":
-        conn = sqlite3.connect("data/app.db")
+    # Formulário: a busca só roda ao enviar, não a cada tecla digitada
+    with st.form("doc_search_form", clear_on_submit=False):
+        col1, col2 = st.columns([2, 1])
         
-        query = "SELECT id, original_name, user_id, is_global, processed, num_chunks FROM documents WHERE 1=1"
-        params = []
+        with col1:
+            search_term = st.text_input("Buscar por nome", placeholder="Digite parte do nome do arquivo...")
         
-        if search_term:
-            query += " AND original_name LIKE ?"
-            params.append(f"%{search_term}%")
+        with col2:
+            filter_type = st.selectbox(
+                "Filtrar por",
+                ["Todos", "Globais", "Privados", "Processados", "Pendentes"]
+            )
         
-        if filter_type == "Globais":
-            query += " AND is_global = 1"
-        elif filter_type == "Privados":
-            query += " AND is_global = 0"
-        elif filter_type == "Processados":
-            query += " AND processed = 1"
-        elif filter_type == "Pendentes":
-            query += " AND processed = 0"
-        
-        query += " ORDER BY upload_date DESC LIMIT 50"
-        
-        cursor = conn.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        if st.form_submit_button("🔍 Buscar"):
+            st.session_state.doc_search = (search_term, filter_type)
+    
+    search_term, filter_type = st.session_state.get("doc_search", ("", "Todos"))
+    
+    if search_term or filter_type != "Todos":
+        results = _cached_search(search_term, filter_type)
         
         if results:
             st.caption(f"Encontrados: {len(results)} documento(s)")
             
-            for doc_id, name, user_id, is_global, processed, chunks in results:
-                permission_badge = "🌍" if is_global else "🔒"
-                status_icon = "✅" if processed else "⏳"
-                st.caption(f"{status_icon} {permission_badge} {name} - {user_id} ({chunks} chunks)")
+            st.dataframe(
+                [
+                    {
+                        "ID": doc_id,
+                        "Documento": name,
+                        "Usuário": user_id,
+                        "Permissão": "🌍 Global" if is_global else "🔒 Privado",
+                        "Status": "✅" if processed else "⏳",
+                        "Chunks": chunks,
+                    }
+                    for doc_id, name, user_id, is_global, processed, chunks in results
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
         else:
             st.info("Nenhum documento encontrado")
 
@@ -17,9 +17,113 @@ Compatibilidade: Python 3.11+
 """
 
 import streamlit as st
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from services.document_manager import get_document_manager
 from utils.pdf_processor import process_document
 from services.vector_store import get_vector_store
+from components.document_permissions_panel import permission_editor, set_documents_global
+
+
+def _db_version(db_path) -> int:
+    """Maior mtime entre o banco e o seu WAL: muda a cada escrita"""
+    version = 0
+    for path in (str(db_path), f"{db_path}-wal"):
+        try:
+            version = max(version, os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return version
+
+
+# Quantos documentos globais de outros usuários mostrar
+OTHER_GLOBAL_LIMIT = 10
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_list(user_id: str, db_version: int):
+    """Documentos do usuário e globais de terceiros; db_version invalida o cache após escritas"""
+    doc_manager = get_document_manager()
+    return (
+        doc_manager.list_user_documents(user_id, include_global=False),
+        # Um a mais que o exibido, só para saber se há outros
+        doc_manager.list_global_docs_excluding(user_id, limit=OTHER_GLOBAL_LIMIT + 1),
+    )
+
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Pool para processamento de documentos fora da thread do script"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="secs-upload")
+
+
+def _process_and_index(doc, user_id: str) -> int:
+    """Extrai, vetoriza e indexa um PDF enviado; retorna o número de chunks"""
+    from utils.vector_store_helper import add_chunks_to_vector_store
+    
+    doc_manager = get_document_manager()
+    
+    # Mesmo diretório usado por upload_document
+    if doc.is_global:
+        doc_path = Path("data/documents/global") / doc.filename
+    else:
+        doc_path = Path("data/documents/users") / user_id / doc.filename
+    
+    try:
+        chunks_data = process_document(str(doc_path))
+        
+        # Preparar chunks com metadata
+        chunks_with_metadata = [
+            {
+                "text": chunk["text"],
+                "page": chunk.get("page", 0),
+                "metadata": {
+                    "source": doc.original_name,
+                    "doc_id": doc.id,
+                    "user_id": user_id,
+                    "is_global": bool(doc.is_global)
+                }
+            }
+            for chunk in chunks_data
+        ]
+        
+        # Adicionar ao vector store
+        add_chunks_to_vector_store(chunks_with_metadata)
+        
+        # Atualizar status
+        doc_manager.update_document_status(
+            doc.id,
+            status="processed",
+            processed=True,
+            num_chunks=len(chunks_data)
+        )
+    except Exception as e:
+        doc_manager.update_document_status(doc.id, status=f"error: {str(e)}")
+        raise
+    
+    return len(chunks_data)
+
+
+@st.fragment(run_every=1.0)
+def _render_upload_jobs(jobs: dict):
+    """Status dos processamentos em segundo plano, reexecutado sozinho a cada segundo"""
+    finished = []
+    for job_id, (name, fut) in list(jobs.items()):
+        if not fut.done():
+            st.info(f"⏳ Processando {name}...")
+            continue
+        
+        del jobs[job_id]
+        try:
+            finished.append(f"✅ {name} processado! {fut.result()} chunks criados.")
+        except Exception as e:
+            finished.append(f"❌ Erro ao processar {name}: {e}")
+    
+    if finished:
+        # Uma única execução completa para atualizar a lista de documentos
+        st.session_state.setdefault("upload_jobs_done", []).extend(finished)
+        st.rerun()
 
 
 def render_document_upload():
@@ -83,8 +187,10 @@ def render_document_upload():
         help="Apenas arquivos PDF são aceitos"
     )
     
+    jobs = st.session_state.setdefault("upload_jobs", {})
+    
     if uploaded_file:
-        file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
+        file_size_mb = uploaded_file.size / (1024 * 1024)
         
         st.info(f"📄 **{uploaded_file.name}** ({file_size_mb:.2f} MB)")
         
@@ -113,60 +219,26 @@ def render_document_upload():
                     if doc:
                         st.success(f"✅ Upload concluído! Documento ID: {doc.id}")
                         
-                        # Processar em background
-                        with st.spinner("Processando documento..."):
-                            try:
-                                # Determinar path
-                                from pathlib import Path
-                                doc_path = Path("data/documents/users") / user_id / doc.filename
-                                
-                                # Processar PDF
-                                chunks_data = process_document(str(doc_path))
-                                
-                                # Preparar chunks com metadata
-                                chunks_with_metadata = [
-                                    {
-                                        "text": chunk["text"],
-                                        "page": chunk.get("page", 0),
-                                        "metadata": {
-                                            "source": doc.original_name,
-                                            "doc_id": doc.id,
-                                            "user_id": user_id,
-                                            "is_global": False
-                                        }
-                                    }
-                                    for chunk in chunks_data
-                                ]
-                                
-                                # Adicionar ao vector store
-                                from utils.vector_store_helper import add_chunks_to_vector_store
-                                add_chunks_to_vector_store(chunks_with_metadata)
-                                
-                                # Atualizar status
-                                doc_manager.update_document_status(
-                                    doc.id,
-                                    status="processed",
-                                    processed=True,
-                                    num_chunks=len(chunks_data)
-                                )
-                                
-                                st.success(f"✅ Documento processado! {len(chunks_data)} chunks criados.")
-                                st.balloons()
-                                st.rerun()
-                                
-                            except Exception as e:
-                                doc_manager.update_document_status(doc.id, status=f"error: {str(e)}")
-                                st.error(f"❌ Erro ao processar: {e}")
+                        # Processar em segundo plano (não bloqueia a thread do script)
+                        jobs[doc.id] = (
+                            doc.original_name,
+                            _executor().submit(_process_and_index, doc, user_id)
+                        )
                     else:
                         st.error("❌ Erro ao fazer upload")
     
+    # Acompanhar processamentos em andamento
+    if jobs:
+        _render_upload_jobs(jobs)
+    for message in st.session_state.pop("upload_jobs_done", []):
+        (st.success if message.startswith("✅") else st.error)(message)
+    
     st.markdown("---")
     
     # Lista de documentos
     st.markdown("### 📚 Meus Documentos")
     
-    docs = doc_manager.list_user_documents(user_id)
-    user_docs = [d for d in docs if d.user_id == user_id]
+    user_docs, global_docs = _cached_list(user_id, _db_version(doc_manager.db_path))
     
     # Filtros
     if user_docs:
@@ -191,74 +263,56 @@ def render_document_upload():
         elif filter_type == "Pendentes":
             filtered_docs = [d for d in user_docs if not d.processed]
         
-        for doc in filtered_docs:
-            # Badge de permissão
-            permission_badge = "🌍 Global" if doc.is_global else "🔒 Privado"
-            status_icon = "✅" if doc.processed else "⏳"
+        if filtered_docs:
+            rows = [
+                {
+                    "ID": doc.id,
+                    "Documento": doc.original_name,
+                    "Tamanho (KB)": round(doc.file_size / 1024, 1),
+                    "Upload": doc.upload_date[:19],
+                    "Status": f"✅ Processado ({doc.num_chunks} chunks)" if doc.processed else f"⏳ {doc.status}",
+                    "Global": bool(doc.is_global),
+                }
+                for doc in filtered_docs
+            ]
             
-            with st.expander(f"{status_icon} {permission_badge} | {doc.original_name}"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.write(f"**Tamanho**: {doc.file_size / 1024:.1f} KB")
-                    st.write(f"**Upload**: {doc.upload_date[:19]}")
-                    st.write(f"**Permissão**: {permission_badge}")
-                    
-                    if doc.processed:
-                        st.write(f"**Status**: ✅ Processado ({doc.num_chunks} chunks)")
+            # Permissão editável na própria tabela (admin only)
+            editor_key = f"my_docs_editor_{filter_type}"
+            changes = permission_editor(rows, key=editor_key, editable=(role == "admin"))
+            if changes:
+                set_documents_global(changes)
+                st.session_state.pop(editor_key, None)
+                st.success(f"✅ Permissão atualizada!")
+                st.rerun(scope="fragment")
+            
+            # Ação única fora da tabela
+            names = {doc.id: doc.original_name for doc in filtered_docs}
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                del_id = st.selectbox(
+                    "Documento para excluir",
+                    options=list(names),
+                    format_func=lambda i: f"{i} - {names[i]}",
+                    key="my_docs_del_select"
+                )
+            with col2:
+                st.write("")
+                if st.button("🗑️ Excluir", key="my_docs_del"):
+                    if doc_manager.delete_document(del_id, user_id, is_admin=(role=="admin")):
+                        st.success("✅ Documento excluído!")
+                        st.rerun(scope="fragment")
                     else:
-                        st.write(f"**Status**: ⏳ {doc.status}")
-                
-                with col2:
-                    # Toggle de permissão (admin only)
-                    if role == "admin":
-                        new_is_global = st.toggle(
-                            "Global",
-                            value=doc.is_global,
-                            key=f"toggle_{doc.id}",
-                            help="Marque para tornar visível a todos"
-                        )
-                        
-                        if new_is_global != doc.is_global:
-                            # Atualizar permissão no banco
-                            import sqlite3
-                            conn = sqlite3.connect("data/app.db")
-                            
-                            # Atualizar documents
-                            conn.execute(
-                                "UPDATE documents SET is_global = ? WHERE id = ?",
-                                (new_is_global, doc.id)
-                            )
-                            
-                            # Atualizar documentos (se existir)
-                            conn.execute(
-                                "UPDATE documentos SET is_global = ? WHERE user_id = ? AND titulo LIKE ?",
-                                (new_is_global, user_id, f"%{doc.original_name.replace('.pdf', '')}%")
-                            )
-                            
-                            conn.commit()
-                            conn.close()
-                            
-                            st.success(f"✅ Permissão atualizada!")
-                            st.rerun()
-                    
-                    st.markdown("")  # Spacing
-                    if st.button("🗑️ Excluir", key=f"del_{doc.id}"):
-                        if doc_manager.delete_document(doc.id, user_id, is_admin=(role=="admin")):
-                            st.success("✅ Documento excluído!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Erro ao excluir")
+                        st.error("❌ Erro ao excluir")
     else:
         st.info("Você ainda não fez upload de nenhum documento.")
     
     # Documentos globais de outros usuários
-    global_docs = [d for d in docs if d.is_global and d.user_id != user_id]
     if global_docs:
         st.markdown("---")
         st.markdown("### 🌐 Documentos Globais (Outros Usuários)")
-        st.caption(f"{len(global_docs)} documento(s) compartilhado(s)")
+        more = "+" if len(global_docs) > OTHER_GLOBAL_LIMIT else ""
+        st.caption(f"{min(len(global_docs), OTHER_GLOBAL_LIMIT)}{more} documento(s) compartilhado(s)")
         
-        for doc in global_docs[:10]:  # Mostrar até 10
+        for doc in global_docs[:OTHER_GLOBAL_LIMIT]:
             status_icon = "✅" if doc.processed else "⏳"
             st.caption(f"{status_icon} 🌍 {doc.original_name} ({doc.num_chunks} chunks) - por {doc.user_id}")
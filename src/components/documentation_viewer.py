@@ -17,100 +17,66 @@ Compatibilidade: Python 3.11+
 """
 
 import streamlit as st
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Tuple
+
+
+@st.cache_data(show_spinner=False)
+def _read(path: str, mtime_ns: int) -> str:
+    """Lê um documento; mtime_ns na chave invalida o cache quando o arquivo muda"""
+    # Só lê no disco quando o par (path, mtime) muda; mapear o arquivo não evitaria
+    # a cópia, já que o conteúdo precisa virar str para ser renderizado
+    return Path(path).read_text(encoding='utf-8')
+
+
+@dataclass(frozen=True, slots=True)
+class DocEntry:
+    """Documento disponível no visualizador"""
+    key: str
+    title: str
+    icon: str
+    path: str
+    category: str
 
 
 class DocumentationViewer:
     """Visualizador de documentação técnica do projeto"""
     
     # Documentos disponíveis com metadados
-    DOCUMENTS = {
-        "ARTIGO_TECNICO.md": {
-            "title": "📖 Artigo Técnico",
-            "icon": "📖",
-            "path": "ARTIGO_TECNICO.md",
-            "category": "Técnico"
-        },
-        "README.md": {
-            "title": "📘 README",
-            "icon": "📘",
-            "path": "README.md",
-            "category": "Geral"
-        },
-        "JUSTIFICATIVA_MODELOS.md": {
-            "title": "🎯 Justificativa de Modelos",
-            "icon": "🎯",
-            "path": "docs/guides/JUSTIFICATIVA_MODELOS.md",
-            "category": "Técnico"
-        },
-        "REQUISITOS_HARDWARE.md": {
-            "title": "⚙️ Requisitos de Hardware",
-            "icon": "⚙️",
-            "path": "REQUISITOS_HARDWARE.md",
-            "category": "Técnico"
-        },
-        "FUNCIONALIDADES_AVANCADAS.md": {
-            "title": "🚀 Funcionalidades Avançadas",
-            "icon": "🚀",
-            "path": "docs/guides/FUNCIONALIDADES_AVANCADAS.md",
-            "category": "Features"
-        },
-        "GUIA_DE_USO.md": {
-            "title": "📚 Guia de Uso",
-            "icon": "📚",
-            "path": "GUIA_DE_USO.md",
-            "category": "Guias"
-        },
-        "COMO_ADICIONAR_PDFS.md": {
-            "title": "📄 Como Adicionar PDFs",
-            "icon": "📄",
-            "path": "COMO_ADICIONAR_PDFS.md",
-            "category": "Guias"
-        },
-        "MCP_SERVER.md": {
-            "title": "🔌 MCP Server",
-            "icon": "🔌",
-            "path": "MCP_SERVER.md",
-            "category": "Técnico"
-        },
-        "requirements.txt": {
-            "title": "📦 Dependências",
-            "icon": "📦",
-            "path": "requirements.txt",
-            "category": "Técnico"
-        },
-        "LICENSE": {
-            "title": "⚖️ Licença",
-            "icon": "⚖️",
-            "path": "LICENSE",
-            "category": "Legal"
-        },
-        "MIGRACAO_AUTOMATICA.md": {
-            "title": "🔄 Migração de Embeddings",
-            "icon": "🔄",
-            "path": "MIGRACAO_AUTOMATICA.md",
-            "category": "Técnico"
-        },
-        "CONFIGURACAO_EMBEDDINGS.md": {
-            "title": "🔢 Configuração de Embeddings",
-            "icon": "🔢",
-            "path": "CONFIGURACAO_EMBEDDINGS.md",
-            "category": "Guias"
-        },
-    }
+    DOCUMENTS: Tuple[DocEntry, ...] = (
+        DocEntry("ARTIGO_TECNICO.md", "📖 Artigo Técnico", "📖", "ARTIGO_TECNICO.md", "Técnico"),
+        DocEntry("README.md", "📘 README", "📘", "README.md", "Geral"),
+        DocEntry("JUSTIFICATIVA_MODELOS.md", "🎯 Justificativa de Modelos", "🎯", "docs/guides/JUSTIFICATIVA_MODELOS.md", "Técnico"),
+        DocEntry("REQUISITOS_HARDWARE.md", "⚙️ Requisitos de Hardware", "⚙️", "REQUISITOS_HARDWARE.md", "Técnico"),
+        DocEntry("FUNCIONALIDADES_AVANCADAS.md", "🚀 Funcionalidades Avançadas", "🚀", "docs/guides/FUNCIONALIDADES_AVANCADAS.md", "Features"),
+        DocEntry("GUIA_DE_USO.md", "📚 Guia de Uso", "📚", "GUIA_DE_USO.md", "Guias"),
+        DocEntry("COMO_ADICIONAR_PDFS.md", "📄 Como Adicionar PDFs", "📄", "COMO_ADICIONAR_PDFS.md", "Guias"),
+        DocEntry("MCP_SERVER.md", "🔌 MCP Server", "🔌", "MCP_SERVER.md", "Técnico"),
+        DocEntry("requirements.txt", "📦 Dependências", "📦", "requirements.txt", "Técnico"),
+        DocEntry("LICENSE", "⚖️ Licença", "⚖️", "LICENSE", "Legal"),
+        DocEntry("MIGRACAO_AUTOMATICA.md", "🔄 Migração de Embeddings", "🔄", "MIGRACAO_AUTOMATICA.md", "Técnico"),
+        DocEntry("CONFIGURACAO_EMBEDDINGS.md", "🔢 Configuração de Embeddings", "🔢", "CONFIGURACAO_EMBEDDINGS.md", "Guias"),
+    )
+    
+    # Pré-calculados uma vez, na carga do módulo
+    BY_KEY: Dict[str, DocEntry] = {doc.key: doc for doc in DOCUMENTS}
+    CATEGORIES: Tuple[str, ...] = ("Todos",) + tuple(sorted({doc.category for doc in DOCUMENTS}))
     
     def __init__(self, base_path: Path):
         self.base_path = base_path
+        self._paths = {doc.key: base_path / doc.path for doc in self.DOCUMENTS}
     
     def load_document(self, doc_key: str) -> str:
         """Carrega conteúdo de um documento"""
         try:
-            doc = self.DOCUMENTS[doc_key]
-            file_path = self.base_path / doc["path"]
-            if file_path.exists():
-                return file_path.read_text(encoding='utf-8')
-            else:
-                return f"⚠️ Documento não encontrado: {doc['path']}"
+            doc = self.BY_KEY[doc_key]
+            file_path = self._paths[doc_key]
+            try:
+                mtime_ns = file_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return f"⚠️ Documento não encontrado: {doc.path}"
+            return _read(str(file_path), mtime_ns)
         except Exception as e:
             return f"❌ Erro ao carregar documento: {e}"
     
@@ -125,10 +91,9 @@ class DocumentationViewer:
         
         with col1:
             # Filtro por categoria
-            categories = ["Todos"] + sorted(set(doc["category"] for doc in self.DOCUMENTS.values()))
             selected_category = st.selectbox(
                 "Categoria",
-                categories,
+                self.CATEGORIES,
                 key="doc_category_filter"
             )
         
@@ -141,24 +106,20 @@ class DocumentationViewer:
             )
         
         # Filtrar documentos
-        filtered_docs = {
-            key: doc for key, doc in self.DOCUMENTS.items()
-            if selected_category == "Todos" or doc["category"] == selected_category
-        }
+        filtered_docs = [
+            doc for doc in self.DOCUMENTS
+            if selected_category == "Todos" or doc.category == selected_category
+        ]
         
-        # Estatísticas
+        # Estatísticas (em cache por conjunto de documentos filtrados)
+        stats = _registry_stats(tuple(doc.key for doc in filtered_docs), str(self.base_path))
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("📄 Documentos", len(filtered_docs))
         with col2:
-            st.metric("📁 Categorias", len(set(doc["category"] for doc in filtered_docs.values())))
+            st.metric("📁 Categorias", stats["categories"])
         with col3:
-            total_size = sum(
-                self.base_path.joinpath(doc["path"]).stat().st_size 
-                for doc in filtered_docs.values() 
-                if self.base_path.joinpath(doc["path"]).exists()
-            )
-            st.metric("💾 Tamanho Total", f"{total_size / 1024:.1f} KB")
+            st.metric("💾 Tamanho Total", f"{stats['total_size'] / 1024:.1f} KB")
         
         st.markdown("---")
         
@@ -167,34 +128,49 @@ class DocumentationViewer:
         
         selected_doc = st.selectbox(
             "Selecione um documento",
-            options=list(filtered_docs.keys()),
-            format_func=lambda x: f"{filtered_docs[x]['icon']} {filtered_docs[x]['title']}",
+            options=[doc.key for doc in filtered_docs],
+            format_func=lambda key: f"{self.BY_KEY[key].icon} {self.BY_KEY[key].title}",
             key="selected_document",
             label_visibility="collapsed"
         )
         
         if selected_doc:
             st.markdown("---")
-            doc = filtered_docs[selected_doc]
+            doc = self.BY_KEY[selected_doc]
             
             # Header do documento
-            st.markdown(f"## {doc['icon']} {doc['title']}")
-            st.caption(f"📁 `{doc['path']}` | 🏷️ {doc['category']}")
+            st.markdown(f"## {doc.icon} {doc.title}")
+            st.caption(f"📁 `{doc.path}` | 🏷️ {doc.category}")
             st.markdown("---")
             
             # Conteúdo
             content = self.load_document(selected_doc)
             
-            if doc['path'].endswith('.md'):
+            if doc.path.endswith('.md'):
                 st.markdown(content)
-            elif doc['path'] == 'requirements.txt':
+            elif doc.path == 'requirements.txt':
                 st.code(content, language='text')
-            elif doc['path'] == 'LICENSE':
+            elif doc.path == 'LICENSE':
                 st.code(content, language='text')
             else:
                 st.text(content)
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _registry_stats(keys: Tuple[str, ...], base_path: str) -> dict:
+    """Número de categorias e tamanho total (um stat() por arquivo) dos documentos"""
+    total_size = 0
+    for key in keys:
+        try:
+            total_size += (Path(base_path) / DocumentationViewer.BY_KEY[key].path).stat().st_size
+        except OSError:
+            pass
+    return {
+        "categories": len({DocumentationViewer.BY_KEY[key].category for key in keys}),
+        "total_size": total_size,
+    }
+
+
 def render_documentation_tab(docs_dir: Path):
     """
     Renderiza aba de documentação completa.
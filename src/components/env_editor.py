@@ -20,7 +20,85 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime
 import os
-import shutil
+import re
+from typing import Dict, Tuple
+
+
+# Linha KEY=valor; comentários e linhas em branco simplesmente não casam
+_ENV_RE = re.compile(r'(?m)^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$')
+
+# Opções fixas dos seletores (montadas uma vez, não a cada rerun)
+_LLM_MODELS = (
+    "openai/gpt-3.5-turbo",
+    "openai/gpt-4",
+    "anthropic/claude-3-haiku",
+    "meta-llama/llama-2-70b-chat",
+)
+_PROVIDER_OPTS = ("local", "openai")
+_ENV_OPTS = ("dev", "staging", "prod")
+_LOG_OPTS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Posição de cada opção, para o índice padrão dos seletores
+_LLM_MODEL_INDEX = {v: i for i, v in enumerate(_LLM_MODELS)}
+_PROVIDER_INDEX = {v: i for i, v in enumerate(_PROVIDER_OPTS)}
+_ENV_INDEX = {v: i for i, v in enumerate(_ENV_OPTS)}
+_LOG_INDEX = {v: i for i, v in enumerate(_LOG_OPTS)}
+
+# Valores aceitos como verdadeiro em variáveis booleanas
+_TRUTHY = frozenset({"true", "1", "yes", "on"})
+
+
+def _to_bool(value: str) -> bool:
+    """Converte valor do .env em booleano"""
+    return value.strip().lower() in _TRUTHY
+
+
+def _from_bool(value: bool) -> str:
+    """Converte booleano no formato gravado no .env"""
+    return "true" if value else "false"
+
+
+# Retenção de backups: (idade máxima em segundos, faixa mantida dentro dela)
+_BACKUP_RETENTION = (
+    (3600, lambda d: d.strftime("%Y%m%d%H%M")),           # por minuto na última hora
+    (86400, lambda d: d.strftime("%Y%m%d%H")),            # por hora no último dia
+    (7 * 86400, lambda d: d.strftime("%Y%m%d")),          # por dia na última semana
+    (28 * 86400, lambda d: d.strftime("%G%V")),           # por semana no último mês
+    (365 * 86400, lambda d: d.strftime("%Y%m")),          # por mês no último ano
+)
+BACKUP_MAX_BYTES = 10 * 1024 * 1024
+
+# Diretórios de backup já criados neste processo
+_BACKUP_DIRS_READY: set = set()
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """Copia src para dst dentro do kernel (sendfile), sem copiar metadados"""
+    if not hasattr(os, "sendfile"):
+        import shutil
+        shutil.copy2(src, dst)
+        return
+    
+    with open(src, "rb") as fsrc:
+        size = os.fstat(fsrc.fileno()).st_size
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            if size and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(dst_fd, 0, size)
+                except OSError:
+                    pass  # Sistema de arquivos sem suporte: segue sem pré-alocar
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst_fd, fsrc.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        finally:
+            os.close(dst_fd)
+
+
+# Último .env lido por caminho: ((mtime_ns, tamanho), variáveis)
+_ENV_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, str]]] = {}
 
 
 class EnvEditor:
@@ -32,32 +110,43 @@ class EnvEditor:
     
     def read_env(self) -> dict:
         """Lê arquivo .env e retorna dicionário"""
-        env_vars = {}
+        try:
+            stat = os.stat(self.env_path)
+        except FileNotFoundError:
+            return {}
         
-        if self.env_path.exists():
-            with open(self.env_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key.strip()] = value.strip()
+        # Arquivo inalterado desde a última leitura: sem reabrir nem reanalisar
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = _ENV_CACHE.get(self.env_path)
+        if cached and cached[0] == signature:
+            return dict(cached[1])
         
-        return env_vars
+        env_vars = dict(_ENV_RE.findall(self.env_path.read_text(encoding="utf-8")))
+        
+        _ENV_CACHE[self.env_path] = (signature, env_vars)
+        return dict(env_vars)
     
     def write_env(self, env_vars: dict) -> bool:
         """Escreve dicionário no arquivo .env"""
         try:
+            body = "".join(f"{key}={value}\n" for key, value in env_vars.items())
+            
+            # Nada mudou: sem backup nem reescrita (só o cabeçalho com a data mudaria)
+            current = self.read_env()
+            if current and body == "".join(f"{key}={value}\n" for key, value in current.items()):
+                return True
+            
             # Backup primeiro
             self.backup_env()
             
-            # Escrever novo .env
-            with open(self.env_path, 'w') as f:
-                f.write("# SECS Chatbot - Configurações\n")
-                f.write(f"# Última atualização: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("#\n\n")
-                
-                for key, value in env_vars.items():
-                    f.write(f"{key}={value}\n")
+            # Escrever novo .env de uma vez
+            parts = [
+                "# SECS Chatbot - Configurações\n",
+                f"# Última atualização: {datetime.now():%Y-%m-%d %H:%M:%S}\n",
+                "#\n\n",
+                body,
+            ]
+            self.env_path.write_text("".join(parts), encoding="utf-8")
             
             return True
         except Exception as e:
@@ -68,14 +157,57 @@ class EnvEditor:
         """Cria backup do .env"""
         if self.env_path.exists():
             backup_dir = Path("data/backups")
-            backup_dir.mkdir(parents=True, exist_ok=True)
+            if backup_dir not in _BACKUP_DIRS_READY:
+                backup_dir.mkdir(parents=True, exist_ok=True)
+                _BACKUP_DIRS_READY.add(backup_dir)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = backup_dir / f".env.backup_{timestamp}"
             
-            shutil.copy2(self.env_path, backup_path)
+            _copy_file(self.env_path, backup_path)
+            self.prune_backups(backup_dir)
             return backup_path
     
+    def prune_backups(self, backup_dir: Path) -> int:
+        """Aplica a política de retenção aos backups do .env; retorna quantos foram removidos"""
+        now = datetime.now()
+        backups = []
+        for path in backup_dir.glob(".env.backup_*"):
+            try:
+                created = datetime.strptime(path.name[len(".env.backup_"):], "%Y%m%d_%H%M%S")
+            except ValueError:
+                continue
+            backups.append((created, path))
+        
+        # Mais recente primeiro: o primeiro backup de cada faixa é o que fica
+        backups.sort(reverse=True)
+        kept, removed, seen = [], [], set()
+        for created, path in backups:
+            age = (now - created).total_seconds()
+            for max_age, slot in _BACKUP_RETENTION:
+                if age < max_age:
+                    bucket = (max_age, slot(created))
+                    break
+            else:
+                bucket = None
+            
+            if kept and (bucket is None or bucket in seen):
+                removed.append(path)
+            else:
+                seen.add(bucket)
+                kept.append(path)
+        
+        # Limite de espaço: descarta os mais antigos, preservando o mais recente
+        total = sum(path.stat().st_size for path in kept)
+        while len(kept) > 1 and total > BACKUP_MAX_BYTES:
+            path = kept.pop()
+            total -= path.stat().st_size
+            removed.append(path)
+        
+        for path in removed:
+            path.unlink(missing_ok=True)
+        return len(removed)
+    
     def render(self):
         """Renderiza interface de edição"""
         st.subheader("⚙️ Configurações do Sistema")
@@ -122,13 +254,8 @@ class EnvEditor:
             
             new_env_vars['LLM_MODEL'] = st.selectbox(
                 "Modelo",
-                options=[
-                    "openai/gpt-3.5-turbo",
-                    "openai/gpt-4",
-                    "anthropic/claude-3-haiku",
-                    "meta-llama/llama-2-70b-chat"
-                ],
-                index=0 if env_vars.get('LLM_MODEL') == 'openai/gpt-3.5-turbo' else 0
+                options=_LLM_MODELS,
+                index=_LLM_MODEL_INDEX.get(env_vars.get('LLM_MODEL', _LLM_MODELS[0]), 0)
             )
             
             new_env_vars['LLM_TEMPERATURE'] = st.slider(
@@ -146,8 +273,8 @@ class EnvEditor:
             
             new_env_vars['EMBEDDING_PROVIDER'] = st.radio(
                 "Provider",
-                options=["local", "openai"],
-                index=0 if env_vars.get('EMBEDDING_PROVIDER') == 'local' else 1,
+                options=_PROVIDER_OPTS,
+                index=_PROVIDER_INDEX.get(env_vars.get('EMBEDDING_PROVIDER', 'local'), 0),
                 help="Local (grátis) ou OpenAI (pago, melhor qualidade)"
             )
             
@@ -177,19 +304,19 @@ class EnvEditor:
             
             new_env_vars['APP_ENVIRONMENT'] = st.selectbox(
                 "Ambiente",
-                options=["dev", "staging", "prod"],
-                index=["dev", "staging", "prod"].index(env_vars.get('APP_ENVIRONMENT', 'dev'))
+                options=_ENV_OPTS,
+                index=_ENV_INDEX.get(env_vars.get('APP_ENVIRONMENT', 'dev'), 0)
             )
             
             new_env_vars['DEBUG'] = st.checkbox(
                 "Modo Debug",
-                value=env_vars.get('DEBUG', 'false').lower() == 'true'
+                value=_to_bool(env_vars.get('DEBUG', 'false'))
             )
             
             new_env_vars['LOG_LEVEL'] = st.selectbox(
                 "Nível de Log",
-                options=["DEBUG", "INFO", "WARNING", "ERROR"],
-                index=["DEBUG", "INFO", "WARNING", "ERROR"].index(env_vars.get('LOG_LEVEL', 'INFO'))
+                options=_LOG_OPTS,
+                index=_LOG_INDEX.get(env_vars.get('LOG_LEVEL', 'INFO'), 1)
             )
         
         # Tab 4: Segurança
@@ -211,7 +338,7 @@ class EnvEditor:
             
             new_env_vars['RATE_LIMIT_ENABLED'] = st.checkbox(
                 "Rate Limiting",
-                value=env_vars.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true',
+                value=_to_bool(env_vars.get('RATE_LIMIT_ENABLED', 'true')),
                 help="Limitar requisições por usuário"
             )
         
@@ -252,7 +379,7 @@ class EnvEditor:
                 # Converter booleanos para string
                 for key in ['DEBUG', 'RATE_LIMIT_ENABLED']:
                     if isinstance(new_env_vars.get(key), bool):
-                        new_env_vars[key] = str(new_env_vars[key]).lower()
+                        new_env_vars[key] = _from_bool(new_env_vars[key])
                 
                 # Converter números para string
                 for key in ['LLM_TEMPERATURE', 'MAX_CONTEXT_CHUNKS', 'EMBEDDING_DIMENSION']:
@@ -20,6 +20,28 @@ import streamlit as st
 from services.user_service import get_user_service
 
 
+@st.cache_resource(show_spinner=False)
+def _users():
+    """Serviço de usuários único por processo do servidor"""
+    return get_user_service()
+
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def _has_any_user() -> bool:
+    """Existe ao menos um usuário cadastrado (consulta com LIMIT 1)"""
+    return _users().has_any_user()
+
+
+def _validate(username: str, password: str, password_confirm: str):
+    """Gera as mensagens de erro do formulário (nenhuma se estiver válido)"""
+    if not username or len(username) < 3:
+        yield "Nome de usuário deve ter pelo menos 3 caracteres"
+    if not password or len(password) < 6:
+        yield "Senha deve ter pelo menos 6 caracteres"
+    if password != password_confirm:
+        yield "Senhas não coincidem"
+
+
 def first_user_wizard() -> bool:
     """
     Wizard para criar o primeiro usuário (admin).
@@ -80,17 +102,7 @@ def first_user_wizard() -> bool:
     
     if submitted:
         # Validações
-        errors = []
-        
-        if not username or len(username) < 3:
-            errors.append("Nome de usuário deve ter pelo menos 3 caracteres")
-        
-        if not password or len(password) < 6:
-            errors.append("Senha deve ter pelo menos 6 caracteres")
-        
-        if password != password_confirm:
-            errors.append("Senhas não coincidem")
-        
+        errors = list(_validate(username, password, password_confirm))
         if errors:
             for error in errors:
                 st.error(f"❌ {error}")
@@ -98,7 +110,7 @@ def first_user_wizard() -> bool:
         
         # Criar usuário
         try:
-            user_service = get_user_service()
+            user_service = _users()
             user_service.create_user(
                 username=username,
                 password=password,
@@ -138,8 +150,11 @@ def check_first_user() -> bool:
         True se há usuários, False se não há
     """
     try:
-        user_service = get_user_service()
-        users = user_service.list_users()
-        return len(users) > 0
-    except:
+        has_users = _has_any_user()
+    except Exception:
         return False
+    
+    # Só o resultado positivo fica em cache: sem usuários, consulta de novo a cada rerun
+    if not has_users:
+        _has_any_user.clear()
+    return has_users
@@ -19,6 +19,13 @@ Compatibilidade: Python 3.11+
 import streamlit as st
 from src.services.auth import get_auth_service
 
+
+@st.cache_resource(show_spinner=False)
+def _auth():
+    """Serviço de autenticação único por processo do servidor"""
+    return get_auth_service()
+
+
 def render_login():
     """Render login form"""
     st.markdown("### 🔐 Login")
@@ -34,7 +41,7 @@ def render_login():
                 st.error("Por favor, preencha todos os campos")
                 return
             
-            auth_service = get_auth_service()
+            auth_service = _auth()
             result = auth_service.login(username, password)
             
             if result:
@@ -75,7 +82,7 @@ def render_user_info(user):
     st.markdown("---")
     
     if st.button("🚪 Sair", use_container_width=True):
-        auth_service = get_auth_service()
+        auth_service = _auth()
         auth_service.logout(st.session_state.session_token)
         del st.session_state.user
         del st.session_state.session_token
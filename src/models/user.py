@@ -19,11 +19,33 @@ Compatibilidade: Python 3.11+
 """
 User Model
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from enum import IntFlag
 from typing import Optional
 
-@dataclass
+# Actions allowed per role
+_PERMS = {
+    'public': frozenset({'view_public_docs', 'chat'}),
+    'secs': frozenset({'view_public_docs', 'view_all_docs', 'chat', 'export'}),
+    'admin': frozenset({'view_public_docs', 'view_all_docs', 'chat', 'export', 'view_logs', 'manage_users'}),
+}
+_NO_PERMS = frozenset()
+
+
+class Role(IntFlag):
+    """Role bits, so role checks are a single AND"""
+    PUBLIC = 1
+    SECS = 2
+    ADMIN = 4
+
+
+# Plain ints for the hot path (IntFlag operators go through the enum machinery)
+_ROLE_BITS = {'public': int(Role.PUBLIC), 'secs': int(Role.SECS), 'admin': int(Role.ADMIN)}
+_ADMIN_BITS = int(Role.ADMIN)
+_SECS_BITS = int(Role.SECS | Role.ADMIN)
+
+@dataclass(frozen=True, slots=True)
 class User:
     """User model"""
     id: int
@@ -34,20 +56,19 @@ class User:
     active: bool = True
     created_at: Optional[datetime] = None
     last_login: Optional[datetime] = None
+    role_bits: int = field(default=0, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'role_bits', _ROLE_BITS.get(self.role, 0))
     
     def has_permission(self, action: str) -> bool:
         """Check if user has permission for an action"""
-        permissions = {
-            'public': ['view_public_docs', 'chat'],
-            'secs': ['view_public_docs', 'view_all_docs', 'chat', 'export'],
-            'admin': ['view_public_docs', 'view_all_docs', 'chat', 'export', 'view_logs', 'manage_users']
-        }
-        return action in permissions.get(self.role, [])
+        return action in _PERMS.get(self.role, _NO_PERMS)
     
     def is_admin(self) -> bool:
         """Check if user is admin"""
-        return self.role == 'admin'
+        return bool(self.role_bits & _ADMIN_BITS)
     
     def is_secs(self) -> bool:
         """Check if user is SECS staff"""
-        return self.role in ['secs', 'admin']
+        return bool(self.role_bits & _SECS_BITS)
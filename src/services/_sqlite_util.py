@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2024-2025 Fábio Linhares
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+SECS Chatbot - Ajustes de conexão SQLite
+============================================================================
+Versão: 7.0
+Data: 2025-12-04
+Descrição: Pragmas compartilhados pelas conexões SQLite dos serviços
+Autoria: Fábio Linhares <fabio.linhares@edu.vertex.org.br>
+Repositório: https://github.com/fabiolinhares/secs_chatbot
+Licença: MIT
+Compatibilidade: Python 3.11+
+============================================================================
+"""
+
+import sqlite3
+
+
+# Applied in order on every service connection
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers don't block the writer
+    "PRAGMA synchronous=NORMAL",      # one fsync per checkpoint, not per commit
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",       # ~64 MB page cache
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _tune(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply the shared WAL/cache pragmas to a connection and return it."""
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    return conn
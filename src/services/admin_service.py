@@ -17,8 +17,10 @@ Compatibilidade: Python 3.11+
 """
 
 import sqlite3
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from src.services._sqlite_util import _tune
 
 
 @dataclass
@@ -35,9 +37,14 @@ class SystemStats:
 class AdminService:
     """Administrative service"""
     
+    # Seconds a get_system_stats() result is reused
+    STATS_TTL = 60
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = _tune(sqlite3.connect(db_path, check_same_thread=False, cached_statements=512))
+        # (expires_at monotonic, SystemStats) of the last get_system_stats()
+        self._stats_cache: Optional[Tuple[float, SystemStats]] = None
     
     def get_all_users_with_stats(self) -> List[Dict[str, Any]]:
         """Get all users with their statistics"""
@@ -71,43 +78,38 @@ class AdminService:
         return users
     
     def get_system_stats(self) -> SystemStats:
-        """Get overall system statistics"""
-        # Total users
-        total_users = self.conn.execute(
-            "SELECT COUNT(*) FROM users"
-        ).fetchone()[0]
-        
-        # Total documents
-        total_documents = self.conn.execute(
-            "SELECT COUNT(*) FROM user_documents"
-        ).fetchone()[0]
-        
-        # Total chunks
-        total_chunks = self.conn.execute(
-            "SELECT COUNT(*) FROM user_chunks"
-        ).fetchone()[0]
-        
-        # Total storage
-        total_storage = self.conn.execute(
-            "SELECT COALESCE(SUM(current_storage_mb), 0) FROM user_quotas"
-        ).fetchone()[0]
-        
-        # Users by role
-        cursor = self.conn.execute(
-            "SELECT role, COUNT(*) FROM users GROUP BY role"
-        )
-        users_by_role = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Top users by storage
-        cursor = self.conn.execute("""
-            SELECT user_id, current_storage_mb
-            FROM user_quotas
-            ORDER BY current_storage_mb DESC
-            LIMIT 10
-        """)
-        top_users = [(row[0], row[1]) for row in cursor.fetchall()]
-        
-        return SystemStats(
+        """Get overall system statistics (cached for STATS_TTL seconds)"""
+        now = time.monotonic()
+        if self._stats_cache and self._stats_cache[0] > now:
+            return self._stats_cache[1]
+        
+        # One read transaction, so all figures come from the same snapshot
+        with self.conn:
+            self.conn.execute("BEGIN")
+            
+            # Totals: users, documents, chunks, storage
+            total_users, total_documents, total_chunks, total_storage = self.conn.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM users),
+                    (SELECT COUNT(*) FROM user_documents),
+                    (SELECT COUNT(*) FROM user_chunks),
+                    (SELECT COALESCE(SUM(current_storage_mb), 0) FROM user_quotas)
+            """).fetchone()
+            
+            # Users by role
+            users_by_role = dict(self.conn.execute(
+                "SELECT role, COUNT(*) FROM users GROUP BY role"
+            ).fetchall())
+            
+            # Top users by storage
+            top_users = self.conn.execute("""
+                SELECT user_id, current_storage_mb
+                FROM user_quotas
+                ORDER BY current_storage_mb DESC
+                LIMIT 10
+            """).fetchall()
+        
+        stats = SystemStats(
             total_users=total_users,
             total_documents=total_documents,
             total_chunks=total_chunks,
@@ -115,43 +117,31 @@ class AdminService:
             users_by_role=users_by_role,
             top_users_by_storage=top_users
         )
+        self._stats_cache = (now + self.STATS_TTL, stats)
+        return stats
     
     def delete_user_documents(self, user_id: str) -> int:
         """Delete all documents for a user (admin only)"""
-        # Get document IDs
-        cursor = self.conn.execute(
-            "SELECT id FROM user_documents WHERE user_id = ?",
-            (user_id,)
-        )
-        doc_ids = [row[0] for row in cursor.fetchall()]
-        
-        if not doc_ids:
-            return 0
-        
-        # Delete chunks
-        placeholders = ','.join('?' * len(doc_ids))
-        self.conn.execute(
-            f"DELETE FROM user_chunks WHERE document_id IN ({placeholders})",
-            doc_ids
-        )
-        
-        # Delete documents
-        self.conn.execute(
-            "DELETE FROM user_documents WHERE user_id = ?",
-            (user_id,)
-        )
-        
-        # Reset quota
-        self.conn.execute(
-            """UPDATE user_quotas 
-               SET current_storage_mb = 0, current_documents = 0
-               WHERE user_id = ?""",
-            (user_id,)
-        )
-        
-        self.conn.commit()
-        
-        return len(doc_ids)
+        # user_chunks rows go with their document via ON DELETE CASCADE (foreign_keys=ON)
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            deleted = self.conn.execute(
+                "DELETE FROM user_documents WHERE user_id = ?",
+                (user_id,)
+            ).rowcount
+            
+            # Reset quota
+            if deleted:
+                self.conn.execute(
+                    """UPDATE user_quotas 
+                       SET current_storage_mb = 0, current_documents = 0
+                       WHERE user_id = ?""",
+                    (user_id,)
+                )
+        
+        if deleted:
+            self._stats_cache = None
+        return deleted
     
     def get_user_activity(self, user_id: str) -> Dict[str, Any]:
         """Get detailed activity for a user"""
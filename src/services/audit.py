@@ -18,9 +18,16 @@ Compatibilidade: Python 3.11+
 
 import sqlite3
 import json
-from datetime import datetime
+import queue
+import atexit
+import threading
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
+from src.services._sqlite_util import _tune
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -34,39 +41,144 @@ class AuditRecord:
     created_at: datetime = field(default_factory=datetime.utcnow)
 
 
+# created_at is stored as INTEGER microseconds since the Unix epoch (UTC)
+_EPOCH = datetime(1970, 1, 1)
+
+_AUDIT_LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user TEXT NOT NULL,
+        role TEXT NOT NULL,
+        input_text TEXT NOT NULL,
+        output_text TEXT NOT NULL,
+        metadata TEXT,
+        created_at INTEGER NOT NULL
+    )
+"""
+
+
+def _to_epoch_us(dt: datetime) -> int:
+    """Naive datetimes are taken as UTC (AuditRecord defaults to utcnow)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_epoch_us(us: int) -> datetime:
+    """Inverse of _to_epoch_us, as a naive UTC datetime."""
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def _to_iso(dt: datetime) -> str:
+    """Legacy TEXT encoding (naive UTC ISO-8601), used until the table is migrated."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
+
+
+_INSERT_SQL = """
+    INSERT INTO audit_log (user, role, input_text, output_text, metadata, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
 class AuditLogger:
     """Logs chat interactions to SQLite database"""
     
+    # Write-behind: rows per transaction and max wait (seconds) to fill a batch
+    BATCH_SIZE = 64
+    BATCH_WAIT = 0.1
+    
     def __init__(self, db_path: str, enabled: bool = True):
         self.db_path = db_path
         self.enabled = enabled
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = _tune(sqlite3.connect(db_path, check_same_thread=False, cached_statements=512))
+        # The writer thread and readers share this connection: every statement runs under the lock
+        self._lock = threading.Lock()
         self._init_tables()
+        
+        # Rows are queued by log() and committed in batches by a single writer thread
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._drain, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
     
     def _init_tables(self):
         """Initialize audit log table"""
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user TEXT NOT NULL,
-                role TEXT NOT NULL,
-                input_text TEXT NOT NULL,
-                output_text TEXT NOT NULL,
-                metadata TEXT,
-                created_at TEXT NOT NULL
+        columns = {row[1]: row[2] for row in self.conn.execute("PRAGMA table_info(audit_log)")}
+        # Tables created before the INTEGER timestamps keep working in TEXT mode
+        # until scripts/migrate_audit_timestamps.py converts them
+        self.legacy_timestamps = columns.get("created_at", "INTEGER").upper() != "INTEGER"
+        if self.legacy_timestamps:
+            logger.warning(
+                "audit_log.created_at is still ISO-8601 TEXT; run "
+                f"'python scripts/migrate_audit_timestamps.py {self.db_path}' (or ./run.sh migrate-audit) "
+                "to switch to INTEGER timestamps"
             )
-        """)
+            self._encode_ts, self._decode_ts = _to_iso, datetime.fromisoformat
+        else:
+            self._encode_ts, self._decode_ts = _to_epoch_us, _from_epoch_us
+        self.conn.execute(_AUDIT_LOG_DDL)
         
         self.conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_audit_created_at ON audit_log(created_at)"
         )
         
-        self.conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_log(user)"
-        )
+        # list_recent(user=...) reads this index in order instead of sorting;
+        # it supersedes idx_audit_user, and planner statistics are refreshed on creation
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_audit_user_time'"
+        ).fetchone()
+        if not exists:
+            self.conn.execute(
+                "CREATE INDEX idx_audit_user_time ON audit_log(user, created_at DESC)"
+            )
+            self.conn.execute("DROP INDEX IF EXISTS idx_audit_user")
+            self.conn.execute("ANALYZE audit_log")
+        
+        # Checked once: search uses FTS when available, otherwise a LIKE scan
+        self._fts_available = self._init_fts()
         
         self.conn.commit()
     
+    def _init_fts(self) -> bool:
+        """Create audit_fts (external content over audit_log) and its sync triggers; False without FTS5"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE audit_fts USING fts5(
+                    input_text, output_text, content='audit_log', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            return False
+        
+        self.conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS audit_fts_ai AFTER INSERT ON audit_log BEGIN
+                INSERT INTO audit_fts(rowid, input_text, output_text)
+                VALUES (new.id, new.input_text, new.output_text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS audit_fts_ad AFTER DELETE ON audit_log BEGIN
+                INSERT INTO audit_fts(audit_fts, rowid, input_text, output_text)
+                VALUES ('delete', old.id, old.input_text, old.output_text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS audit_fts_au AFTER UPDATE OF input_text, output_text ON audit_log BEGIN
+                INSERT INTO audit_fts(audit_fts, rowid, input_text, output_text)
+                VALUES ('delete', old.id, old.input_text, old.output_text);
+                INSERT INTO audit_fts(rowid, input_text, output_text)
+                VALUES (new.id, new.input_text, new.output_text);
+            END;
+        """)
+        self.conn.execute("INSERT INTO audit_fts(audit_fts) VALUES ('rebuild')")
+        return True
+    
     def log(self, record: AuditRecord) -> None:
         """
         Log an interaction.
@@ -77,21 +189,64 @@ class AuditLogger:
         if not self.enabled:
             return
         
-        meta_json = json.dumps(record.metadata or {}, ensure_ascii=False)
+        # default=str: metadata values that are not JSON types are logged as text
+        meta_json = json.dumps(record.metadata or {}, ensure_ascii=False, default=str)
         
-        self.conn.execute("""
-            INSERT INTO audit_log (user, role, input_text, output_text, metadata, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
+        self._queue.put((
             record.user,
             record.role,
             record.input_text,
             record.output_text,
             meta_json,
-            record.created_at.isoformat()
+            self._encode_ts(record.created_at)
         ))
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every record queued so far is committed.
         
-        self.conn.commit()
+        Returns:
+            True if the writer caught up within the timeout
+        """
+        if not self._writer.is_alive():
+            logger.error("Audit writer thread is not running; queued records are not being written")
+            return False
+        
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            logger.error("Audit writer did not catch up before the flush timeout", timeout=timeout)
+            return False
+        return True
+    
+    def _drain(self) -> None:
+        """Writer thread: commit queued rows in batches of up to BATCH_SIZE."""
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=self.BATCH_WAIT)
+                except queue.Empty:
+                    break
+            
+            try:
+                if batch:
+                    with self._lock, self.conn:
+                        self.conn.executemany(_INSERT_SQL, batch)
+            except Exception as e:
+                # Any failure only drops this batch; the writer keeps running
+                logger.error("Failed to write audit records", count=len(batch), error=e)
+            finally:
+                # Flush callers are always released
+                for waiter in waiters:
+                    waiter.set()
     
     def list_recent(self, limit: int = 50, user: Optional[str] = None) -> List[AuditRecord]:
         """
@@ -104,6 +259,9 @@ class AuditLogger:
         Returns:
             List of AuditRecord objects
         """
+        # Reads must see every record logged before them
+        self.flush()
+        
         if user:
             query = """
                 SELECT user, role, input_text, output_text, metadata, created_at
@@ -122,8 +280,8 @@ class AuditLogger:
             """
             params = (limit,)
         
-        cur = self.conn.execute(query, params)
-        rows = cur.fetchall()
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
         
         records = []
         for row in rows:
@@ -136,33 +294,37 @@ class AuditLogger:
                 input_text=input_text,
                 output_text=output_text,
                 metadata=meta_dict,
-                created_at=datetime.fromisoformat(created_at)
+                created_at=self._decode_ts(created_at)
             ))
         
         return records
     
     def get_stats(self) -> Dict[str, Any]:
         """Get audit statistics"""
-        total = self.conn.execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
-        
-        # Unique users
-        unique_users = self.conn.execute(
-            "SELECT COUNT(DISTINCT user) FROM audit_log"
-        ).fetchone()[0]
-        
-        # Interactions by role
-        by_role = self.conn.execute("""
-            SELECT role, COUNT(*) 
-            FROM audit_log 
-            GROUP BY role
-        """).fetchall()
-        
-        # Recent activity (last 24 hours)
-        recent = self.conn.execute("""
-            SELECT COUNT(*) 
-            FROM audit_log 
-            WHERE created_at > datetime('now', '-1 day')
-        """).fetchone()[0]
+        self.flush()
+        since = self._encode_ts(datetime.now(timezone.utc) - timedelta(days=1))
+        
+        with self._lock:
+            total = self.conn.execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+        
+            # Unique users
+            unique_users = self.conn.execute(
+                "SELECT COUNT(DISTINCT user) FROM audit_log"
+            ).fetchone()[0]
+        
+            # Interactions by role
+            by_role = self.conn.execute("""
+                SELECT role, COUNT(*) 
+                FROM audit_log 
+                GROUP BY role
+            """).fetchall()
+        
+            # Recent activity (last 24 hours)
+            recent = self.conn.execute("""
+                SELECT COUNT(*) 
+                FROM audit_log 
+                WHERE created_at > ?
+            """, (since,)).fetchone()[0]
         
         return {
             'total_interactions': total,
@@ -175,6 +337,9 @@ class AuditLogger:
         """
         Search audit logs by text.
         
+        Uses audit_fts when SQLite has FTS5, otherwise a LIKE scan. A blank
+        query matches nothing.
+        
         Args:
             query: Search term
             limit: Maximum results
@@ -182,15 +347,33 @@ class AuditLogger:
         Returns:
             List of matching AuditRecord objects
         """
-        cur = self.conn.execute("""
-            SELECT user, role, input_text, output_text, metadata, created_at
-            FROM audit_log 
-            WHERE input_text LIKE ? OR output_text LIKE ?
-            ORDER BY created_at DESC 
-            LIMIT ?
-        """, (f'%{query}%', f'%{query}%', limit))
+        words = [word.replace('"', '') for word in query.split()]
+        words = [word for word in words if word]
+        if not words:
+            return []
+        
+        self.flush()
         
-        rows = cur.fetchall()
+        with self._lock:
+            if self._fts_available:
+                # Every word as a prefix term, e.g. 'pauta reun' -> "pauta"* "reun"*
+                fts_query = " ".join(f'"{word}"*' for word in words)
+                rows = self.conn.execute("""
+                    SELECT a.user, a.role, a.input_text, a.output_text, a.metadata, a.created_at
+                    FROM audit_fts f
+                    JOIN audit_log a ON a.id = f.rowid
+                    WHERE audit_fts MATCH ?
+                    ORDER BY a.created_at DESC
+                    LIMIT ?
+                """, (fts_query, limit)).fetchall()
+            else:
+                rows = self.conn.execute("""
+                    SELECT user, role, input_text, output_text, metadata, created_at
+                    FROM audit_log 
+                    WHERE input_text LIKE ? OR output_text LIKE ?
+                    ORDER BY created_at DESC 
+                    LIMIT ?
+                """, (f'%{query}%', f'%{query}%', limit)).fetchall()
         
         records = []
         for row in rows:
@@ -203,7 +386,7 @@ class AuditLogger:
                 input_text=input_text,
                 output_text=output_text,
                 metadata=meta_dict,
-                created_at=datetime.fromisoformat(created_at)
+                created_at=self._decode_ts(created_at)
             ))
         
         return records
@@ -19,22 +19,81 @@ Compatibilidade: Python 3.11+
 import sqlite3
 import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional
 from src.config import settings
 from src.models.user import User
+from src.services._sqlite_util import _tune
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    ARGON2_SUPPORT = True
+except ImportError:
+    ARGON2_SUPPORT = False
+
+# scrypt parameters for the stdlib fallback when argon2-cffi is not installed
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+
+# Hot-path statements kept as constants so every call hits the connection's statement cache
+_SESSION_USER_SQL = """
+    SELECT u.id, u.username, u.full_name, u.email, u.role, u.active, u.created_at, u.last_login,
+           s.expires_at
+    FROM users u
+    JOIN sessions s ON u.id = s.user_id
+    WHERE s.session_token = ? AND s.expires_at > CURRENT_TIMESTAMP AND u.active = 1
+"""
+
 
 class AuthService:
     """Handles authentication and session management"""
     
+    # In-process session lookup cache: entry lifetime (seconds) and max entries (LRU)
+    SESSION_CACHE_TTL = 30
+    SESSION_CACHE_SIZE = 10_000
+    
+    _hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1) if ARGON2_SUPPORT else None
+    
     def __init__(self, db_path: str = None):
         self.db_path = db_path or settings.db_path_resolved
+        # One long-lived read/write connection; autocommit, explicit BEGIN IMMEDIATE for writes
+        self.conn = _tune(sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=512
+        ))
+        self._lock = threading.Lock()
+        # session_token -> (User, expires_at monotonic), least recently used first
+        self._session_cache: "OrderedDict[str, tuple[User, float]]" = OrderedDict()
+        self._session_cache_lock = threading.Lock()
         self._init_db()
         self._create_default_users()
+        # Read-only connection for session validation, so it never waits on the writer lock
+        self.ro_conn = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri=True, check_same_thread=False, cached_statements=512
+        )
+        self.ro_conn.execute("PRAGMA busy_timeout=5000")
+        self._ro_lock = threading.Lock()
+    
+    @contextmanager
+    def _transaction(self):
+        """Run a group of writes on the shared connection as one immediate transaction"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
     
     def _init_db(self):
         """Initialize authentication tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cur = conn.cursor()
             
             # Users table
@@ -69,8 +128,6 @@ class AuthService:
                 CREATE INDEX IF NOT EXISTS idx_sessions_token 
                 ON sessions(session_token)
             """)
-            
-            conn.commit()
     
     def _create_default_users(self):
         """Create default users if they don't exist"""
@@ -80,7 +137,7 @@ class AuthService:
             ('publico', 'publico123', 'Usuário Público', 'publico@ufal.br', 'public'),
         ]
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cur = conn.cursor()
             
             for username, password, full_name, email, role in default_users:
@@ -92,106 +149,164 @@ class AuthService:
                         INSERT INTO users (username, password_hash, full_name, email, role)
                         VALUES (?, ?, ?, ?, ?)
                     """, (username, password_hash, full_name, email, role))
-            
-            conn.commit()
     
     def _hash_password(self, password: str) -> str:
-        """Hash password using SHA256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with argon2id (scrypt when argon2-cffi is missing)"""
+        if self._hasher is not None:
+            return self._hasher.hash(password)
+        salt = secrets.token_bytes(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    
+    def _verify_password(self, stored_hash: str, password: str) -> tuple[bool, bool]:
+        """
+        Check a password against a stored hash.
+        Returns (matches, needs_rehash); legacy unsalted SHA-256 hashes always need a rehash.
+        """
+        if stored_hash.startswith("$argon2"):
+            if self._hasher is None:
+                return False, False
+            try:
+                self._hasher.verify(stored_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False, False
+            return True, self._hasher.check_needs_rehash(stored_hash)
+        
+        if stored_hash.startswith("scrypt$"):
+            try:
+                _, n, r, p, salt, digest = stored_hash.split("$")
+                candidate = hashlib.scrypt(
+                    password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p)
+                )
+            except ValueError:
+                return False, False
+            matches = secrets.compare_digest(candidate.hex(), digest)
+            return matches, matches and self._hasher is not None
+        
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        matches = secrets.compare_digest(legacy, stored_hash)
+        return matches, matches
     
     def login(self, username: str, password: str) -> Optional[tuple[User, str]]:
         """
         Authenticate user and create session.
         Returns (User, session_token) if successful, None otherwise.
         """
-        password_hash = self._hash_password(password)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            
-            # Find user
-            cur.execute("""
-                SELECT id, username, full_name, email, role, active, created_at, last_login
+        # Find user
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT id, username, full_name, email, role, active, created_at, last_login, password_hash
                 FROM users
-                WHERE username = ? AND password_hash = ? AND active = 1
-            """, (username, password_hash))
-            
-            row = cur.fetchone()
-            if not row:
-                return None
-            
-            # Create user object
-            user = User(
-                id=row[0],
-                username=row[1],
-                full_name=row[2],
-                email=row[3],
-                role=row[4],
-                active=bool(row[5]),
-                created_at=row[6],
-                last_login=row[7]
-            )
-            
-            # Create session
-            session_token = secrets.token_urlsafe(32)
-            expires_at = datetime.now() + timedelta(hours=24)
-            
-            cur.execute("""
+                WHERE username = ? AND active = 1
+            """, (username,)).fetchone()
+        
+        if not row:
+            return None
+        
+        matches, needs_rehash = self._verify_password(row[8], password)
+        if not matches:
+            return None
+        
+        # Create user object
+        user = User(
+            id=row[0],
+            username=row[1],
+            full_name=row[2],
+            email=row[3],
+            role=row[4],
+            active=bool(row[5]),
+            created_at=row[6],
+            last_login=row[7]
+        )
+        
+        # Create session
+        session_token = secrets.token_urlsafe(32)
+        expires_at = datetime.now() + timedelta(hours=24)
+        
+        with self._transaction() as conn:
+            conn.execute("""
                 INSERT INTO sessions (user_id, session_token, expires_at)
                 VALUES (?, ?, ?)
             """, (user.id, session_token, expires_at))
             
             # Update last login
-            cur.execute("""
+            conn.execute("""
                 UPDATE users SET last_login = CURRENT_TIMESTAMP
                 WHERE id = ?
             """, (user.id,))
             
-            conn.commit()
-            
-            return user, session_token
+            # Lazy migration: store the password under the current KDF
+            if needs_rehash:
+                conn.execute(
+                    "UPDATE users SET password_hash = ? WHERE id = ?",
+                    (self._hash_password(password), user.id)
+                )
+        
+        return user, session_token
     
     def logout(self, session_token: str):
         """Invalidate session"""
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
-            conn.commit()
+        with self._session_cache_lock:
+            self._session_cache.pop(session_token, None)
+        with self._lock:
+            self.conn.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
     
     def get_user_by_session(self, session_token: str) -> Optional[User]:
         """Get user from session token"""
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            
-            # Find valid session
-            cur.execute("""
-                SELECT u.id, u.username, u.full_name, u.email, u.role, u.active, u.created_at, u.last_login
-                FROM users u
-                JOIN sessions s ON u.id = s.user_id
-                WHERE s.session_token = ? AND s.expires_at > CURRENT_TIMESTAMP AND u.active = 1
-            """, (session_token,))
-            
-            row = cur.fetchone()
-            if not row:
-                return None
-            
-            return User(
-                id=row[0],
-                username=row[1],
-                full_name=row[2],
-                email=row[3],
-                role=row[4],
-                active=bool(row[5]),
-                created_at=row[6],
-                last_login=row[7]
-            )
+        now = time.monotonic()
+        with self._session_cache_lock:
+            cached = self._session_cache.get(session_token)
+            if cached and cached[1] > now:
+                self._session_cache.move_to_end(session_token)
+                return cached[0]
+        
+        # Find valid session
+        with self._ro_lock:
+            row = self.ro_conn.execute(_SESSION_USER_SQL, (session_token,)).fetchone()
+        
+        if not row:
+            return None
+        
+        user = User(
+            id=row[0],
+            username=row[1],
+            full_name=row[2],
+            email=row[3],
+            role=row[4],
+            active=bool(row[5]),
+            created_at=row[6],
+            last_login=row[7]
+        )
+        
+        # Never cache past the session's own expiry (stored in local time by login)
+        try:
+            remaining = (datetime.fromisoformat(str(row[8])) - datetime.now()).total_seconds()
+        except ValueError:
+            remaining = 0
+        if remaining <= 0:
+            return user
+        
+        # Only valid sessions are cached, so random tokens can't flood the cache
+        with self._session_cache_lock:
+            self._session_cache[session_token] = (user, now + min(self.SESSION_CACHE_TTL, remaining))
+            self._session_cache.move_to_end(session_token)
+            if len(self._session_cache) > self.SESSION_CACHE_SIZE:
+                self._session_cache.popitem(last=False)
+        return user
+    
+    def invalidate_user_sessions(self, username: str):
+        """Drop cached session lookups for a user whose account changed"""
+        with self._session_cache_lock:
+            stale = [token for token, (user, _) in self._session_cache.items() if user.username == username]
+            for token in stale:
+                del self._session_cache[token]
     
     def cleanup_expired_sessions(self):
         """Remove expired sessions"""
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM sessions WHERE expires_at < CURRENT_TIMESTAMP")
-            conn.commit()
+        with self._lock:
+            self.conn.execute("DELETE FROM sessions WHERE expires_at < CURRENT_TIMESTAMP")
+        with self._session_cache_lock:
+            self._session_cache.clear()
 
 # Singleton instance
 _auth_service = None
@@ -202,3 +317,9 @@ def get_auth_service() -> AuthService:
     if _auth_service is None:
         _auth_service = AuthService()
     return _auth_service
+
+
+def invalidate_user_sessions(username: str):
+    """Drop cached session lookups for a user, if the auth service is running"""
+    if _auth_service is not None:
+        _auth_service.invalidate_user_sessions(username)
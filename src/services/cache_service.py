@@ -18,17 +18,78 @@ Compatibilidade: Python 3.11+
 
 import sqlite3
 import re
+import json
+import threading
 import unicodedata
-from typing import Optional
+from functools import lru_cache
+import numpy as np
+from typing import List, Optional
 from pathlib import Path
+from src.services._sqlite_util import _tune
+
+
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_SPACE_RE = re.compile(r'\s+')
+
+# Negative/uncertain answers that must not be cached
+_NEGATIVE_SIGNALS = (
+    "não encontrei",
+    "nao encontrei",
+    "não há base",
+    "nao ha base",
+    "sem base documental",
+    "não tenho certeza",
+    "nao tenho certeza",
+    "não há evidência",
+    "nao ha evidencia",
+    "não sei",
+    "nao sei",
+)
+# One alternation scanned in a single pass; IGNORECASE avoids lowercasing a copy of the answer
+_BYPASS_RE = re.compile('|'.join(map(re.escape, _NEGATIVE_SIGNALS)), re.IGNORECASE)
+
+
+@lru_cache(maxsize=8192)
+def _normalize(question: str) -> str:
+    """Accent-, case-, punctuation- and space-insensitive form of a question."""
+    # Remove accents
+    nfkd = unicodedata.normalize('NFKD', question)
+    text = ''.join([c for c in nfkd if not unicodedata.combining(c)])
+    
+    # Lowercase, drop punctuation, collapse spaces
+    text = _PUNCT_RE.sub('', text.lower().strip())
+    return _SPACE_RE.sub(' ', text)
+
+
+# Hot-path statements kept as constants so every call hits the connection's statement cache
+_USER_ANSWER_SQL = "SELECT answer FROM qa_user_cache WHERE user = ? AND normalized = ?"
+_UPSERT_USER_ANSWER_SQL = """
+    INSERT INTO qa_user_cache (user, normalized, question, answer)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(user, normalized) DO UPDATE SET 
+        answer=excluded.answer,
+        question=excluded.question,
+        created_at=CURRENT_TIMESTAMP
+"""
 
 
 class CacheService:
-    """Manages Q&A caching with user and global levels"""
+    """Manages Q&A caching with user, global and semantic levels"""
+    
+    # Semantic cache gates: query similarity and evidence (chunk id) overlap
+    SEMANTIC_MIN_SIMILARITY = 0.92
+    SEMANTIC_MIN_OVERLAP = 0.6
+    # Most recent semantic entries per user considered on lookup
+    SEMANTIC_SCAN_LIMIT = 500
     
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = _tune(sqlite3.connect(db_path, check_same_thread=False, cached_statements=512))
+        # The connection is shared across threads: every statement runs under this lock
+        self._lock = threading.Lock()
+        # Per-user semantic entries kept decoded in memory, newest first:
+        # user -> (int8 embedding matrix, answers, evidence chunk-id sets)
+        self._semantic_index = {}
         self._init_tables()
     
     def _init_tables(self):
@@ -49,6 +110,8 @@ class CacheService:
         self.conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_user_norm ON qa_user_cache(user, normalized)"
         )
+        # Superseded covering index that duplicated every answer
+        self.conn.execute("DROP INDEX IF EXISTS idx_user_norm_cover")
         
         # Global cache (shared across users)
         self.conn.execute("""
@@ -61,6 +124,23 @@ class CacheService:
             )
         """)
         
+        # Semantic cache (per user, keyed by query embedding + evidence chunks)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS qa_semantic_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                query_embedding BLOB NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_semantic_user ON qa_semantic_cache(user, id)"
+        )
+        
         self.conn.commit()
     
     def normalize_question(self, question: str) -> str:
@@ -76,20 +156,7 @@ class CacheService:
         Example:
             "Qual é a PAUTA??" -> "qual e a pauta"
         """
-        # Remove accents
-        nfkd = unicodedata.normalize('NFKD', question)
-        text = ''.join([c for c in nfkd if not unicodedata.combining(c)])
-        
-        # Lowercase
-        text = text.lower().strip()
-        
-        # Remove punctuation (keep alphanumeric and spaces)
-        text = re.sub(r'[^\w\s]', '', text)
-        
-        # Normalize spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text
+        return _normalize(question)
     
     def should_bypass_cache(self, answer: str) -> bool:
         """
@@ -104,22 +171,7 @@ class CacheService:
         Returns:
             True if should bypass cache, False otherwise
         """
-        negative_signals = [
-            "não encontrei",
-            "nao encontrei",
-            "não há base",
-            "nao ha base",
-            "sem base documental",
-            "não tenho certeza",
-            "nao tenho certeza",
-            "não há evidência",
-            "nao ha evidencia",
-            "não sei",
-            "nao sei",
-        ]
-        
-        answer_lower = answer.lower()
-        return any(signal in answer_lower for signal in negative_signals)
+        return _BYPASS_RE.search(answer) is not None
     
     def get_user_answer(self, user_id: str, question: str) -> Optional[str]:
         """
@@ -134,10 +186,8 @@ class CacheService:
         """
         normalized = self.normalize_question(question)
         
-        row = self.conn.execute(
-            "SELECT answer FROM qa_user_cache WHERE user = ? AND normalized = ?",
-            (user_id, normalized)
-        ).fetchone()
+        with self._lock:
+            row = self.conn.execute(_USER_ANSWER_SQL, (user_id, normalized)).fetchone()
         
         return row[0] if row else None
     
@@ -152,16 +202,10 @@ class CacheService:
         """
         normalized = self.normalize_question(question)
         
-        self.conn.execute("""
-            INSERT INTO qa_user_cache (user, normalized, question, answer)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user, normalized) DO UPDATE SET 
-                answer=excluded.answer,
-                question=excluded.question,
-                created_at=CURRENT_TIMESTAMP
-        """, (user_id, normalized, question, answer))
+        with self._lock:
+            self.conn.execute(_UPSERT_USER_ANSWER_SQL, (user_id, normalized, question, answer))
         
-        self.conn.commit()
+            self.conn.commit()
     
     def get_global_answer(self, question: str) -> Optional[str]:
         """
@@ -175,10 +219,11 @@ class CacheService:
         """
         normalized = self.normalize_question(question)
         
-        row = self.conn.execute(
-            "SELECT answer FROM qa_global_cache WHERE normalized = ?",
-            (normalized,)
-        ).fetchone()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT answer FROM qa_global_cache WHERE normalized = ?",
+                (normalized,)
+            ).fetchone()
         
         return row[0] if row else None
     
@@ -192,31 +237,149 @@ class CacheService:
         """
         normalized = self.normalize_question(question)
         
-        self.conn.execute("""
-            INSERT INTO qa_global_cache (normalized, question, answer)
-            VALUES (?, ?, ?)
-            ON CONFLICT(normalized) DO UPDATE SET 
-                answer=excluded.answer,
-                question=excluded.question,
-                created_at=CURRENT_TIMESTAMP
-        """, (normalized, question, answer))
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO qa_global_cache (normalized, question, answer)
+                VALUES (?, ?, ?)
+                ON CONFLICT(normalized) DO UPDATE SET 
+                    answer=excluded.answer,
+                    question=excluded.question,
+                    created_at=CURRENT_TIMESTAMP
+            """, (normalized, question, answer))
         
-        self.conn.commit()
+            self.conn.commit()
+    
+    def semantic_lookup(self, user_id: str, query_embedding: np.ndarray, chunk_ids: List[int]) -> Optional[str]:
+        """
+        Get a cached answer for a paraphrase of an earlier question.
+        
+        A hit requires the closest cached query to pass SEMANTIC_MIN_SIMILARITY
+        and its evidence chunks to overlap the current ones (Jaccard) by at
+        least SEMANTIC_MIN_OVERLAP, so answers are only reused when they are
+        grounded on the same retrieved documents.
+        
+        Args:
+            user_id: User identifier
+            query_embedding: Embedding of the (rewritten) question
+            chunk_ids: IDs of the chunks retrieved for the question
+            
+        Returns:
+            Cached answer if both gates pass, None otherwise
+        """
+        if not chunk_ids:
+            return None
+        # Imported here: loading the embeddings module initializes the model
+        from src.services.embeddings import quantize_int8
+        from src.services.vector_store import cosine_scores
+        
+        with self._lock:
+            entry = self._semantic_index.get(user_id)
+            if entry is None:
+                entry = self._load_semantic_entries(user_id)
+                self._semantic_index[user_id] = entry
+        matrix, answers, evidence = entry
+        
+        query = quantize_int8(query_embedding)
+        if not answers or matrix.shape[1] != query.shape[0]:
+            # Nothing cached yet, or the embedding model changed since these entries were written
+            return None
+        
+        scores = cosine_scores(matrix, query)
+        best = int(np.argmax(scores))
+        if scores[best] <= self.SEMANTIC_MIN_SIMILARITY:
+            return None
+        
+        current = set(chunk_ids)
+        cached = evidence[best]
+        overlap = len(current & cached) / len(current | cached)
+        if overlap <= self.SEMANTIC_MIN_OVERLAP:
+            return None
+        
+        return answers[best]
+    
+    def _load_semantic_entries(self, user_id: str) -> tuple:
+        """Decode a user's most recent semantic entries (caller holds the lock)"""
+        from src.services.embeddings import quantize_int8
+        
+        rows = self.conn.execute(
+            "SELECT answer, query_embedding, chunk_ids FROM qa_semantic_cache "
+            "WHERE user = ? ORDER BY id DESC LIMIT ?",
+            (user_id, self.SEMANTIC_SCAN_LIMIT)
+        ).fetchall()
+        if rows:
+            # Entries from an older embedding model have another width; keep the newest model's
+            width = len(rows[0][1])
+            rows = [row for row in rows if len(row[1]) == width]
+        if not rows:
+            return np.empty((0, 0), dtype=np.int8), [], []
+        
+        matrix = np.stack([quantize_int8(np.frombuffer(row[1], dtype=np.float32)) for row in rows])
+        return matrix, [row[0] for row in rows], [set(json.loads(row[2])) for row in rows]
+    
+    def set_semantic_answer(self, user_id: str, question: str, query_embedding: np.ndarray,
+                            chunk_ids: List[int], answer: str) -> None:
+        """
+        Cache answer with the query embedding and evidence it was grounded on.
+        
+        Args:
+            user_id: User identifier
+            question: User's question
+            query_embedding: Embedding of the (rewritten) question
+            chunk_ids: IDs of the chunks used to answer
+            answer: Response to cache
+        """
+        if not chunk_ids:
+            return
+        
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO qa_semantic_cache (user, question, answer, query_embedding, chunk_ids)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                user_id,
+                question,
+                answer,
+                np.asarray(query_embedding, dtype=np.float32).tobytes(),
+                json.dumps(list(chunk_ids))
+            ))
+            
+            self.conn.commit()
+            
+            # Keep the in-memory entries in step with the table
+            entry = self._semantic_index.get(user_id)
+            if entry is not None:
+                from src.services.embeddings import quantize_int8
+                row = quantize_int8(query_embedding)
+                matrix, answers, evidence = entry
+                if answers and matrix.shape[1] != row.shape[0]:
+                    # New embedding model: older entries can no longer match
+                    matrix, answers, evidence = matrix[:0], [], []
+                limit = self.SEMANTIC_SCAN_LIMIT
+                self._semantic_index[user_id] = (
+                    np.vstack([row[np.newaxis, :], matrix[:limit - 1]]) if answers else row[np.newaxis, :],
+                    [answer] + answers[:limit - 1],
+                    [set(chunk_ids)] + evidence[:limit - 1],
+                )
     
     def clear_user_cache(self, user_id: str) -> None:
         """Clear all cached answers for a specific user"""
-        self.conn.execute("DELETE FROM qa_user_cache WHERE user = ?", (user_id,))
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("DELETE FROM qa_user_cache WHERE user = ?", (user_id,))
+            self.conn.execute("DELETE FROM qa_semantic_cache WHERE user = ?", (user_id,))
+            self.conn.commit()
+            self._semantic_index.pop(user_id, None)
     
     def clear_global_cache(self) -> None:
         """Clear entire global cache"""
-        self.conn.execute("DELETE FROM qa_global_cache")
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("DELETE FROM qa_global_cache")
+            self.conn.commit()
     
     def get_stats(self) -> dict:
         """Get cache statistics"""
-        user_count = self.conn.execute("SELECT COUNT(*) FROM qa_user_cache").fetchone()[0]
-        global_count = self.conn.execute("SELECT COUNT(*) FROM qa_global_cache").fetchone()[0]
+        with self._lock:
+            user_count = self.conn.execute("SELECT COUNT(*) FROM qa_user_cache").fetchone()[0]
+            global_count = self.conn.execute("SELECT COUNT(*) FROM qa_global_cache").fetchone()[0]
         
         return {
             'user_cache_entries': user_count,
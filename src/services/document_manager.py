@@ -17,6 +17,8 @@ Compatibilidade: Python 3.11+
 """
 
 import sqlite3
+import os
+import tempfile
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, BinaryIO
@@ -27,6 +29,9 @@ from config import get_settings
 
 settings = get_settings()
 
+# Tamanho do bloco na cópia de uploads para o disco
+COPY_BLOCK_SIZE = 1 << 20
+
 
 @dataclass
 class Document:
@@ -98,9 +103,77 @@ class DocumentManager:
             )
         """)
         
+        # Vínculo estável com a linha correspondente em documentos (vector store);
+        # ao criar a coluna, preenche uma vez pelo casamento de nome usado antes
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        if "documento_id" not in columns:
+            conn.execute("ALTER TABLE documents ADD COLUMN documento_id INTEGER")
+            try:
+                conn.execute("""
+                    UPDATE documents SET documento_id = (
+                        SELECT d.id FROM documentos d
+                        WHERE d.user_id = documents.user_id
+                          AND d.titulo LIKE '%' || REPLACE(documents.original_name, '.pdf', '') || '%'
+                        LIMIT 1
+                    )
+                """)
+            except sqlite3.OperationalError:
+                # documentos ainda não existe ou não tem user_id
+                pass
+        
+        # Índices para as listagens por usuário e os filtros de permissão/status;
+        # atualiza as estatísticas do planner quando algum é criado
+        indexes = {
+            "idx_docs_user_date": "ON documents(user_id, upload_date DESC)",
+            "idx_docs_flags": "ON documents(is_global, processed)",
+        }
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        missing = [name for name in indexes if name not in existing]
+        for name in missing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {indexes[name]}")
+        if missing:
+            conn.execute("ANALYZE")
+        
+        # Índice de texto (FTS5) sobre o nome original, mantido por triggers
+        self._init_fts(conn)
+        
         conn.commit()
         conn.close()
     
+    def _init_fts(self, conn: sqlite3.Connection):
+        """Cria documents_fts (external content) e os triggers de sincronização"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents_fts'"
+        ).fetchone()
+        if exists:
+            return
+        
+        try:
+            conn.execute("""
+                CREATE VIRTUAL TABLE documents_fts USING fts5(
+                    original_name, content='documents', content_rowid='id'
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite compilado sem FTS5: a busca usa LIKE
+            return
+        
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+                INSERT INTO documents_fts(rowid, original_name) VALUES (new.id, new.original_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, original_name)
+                VALUES ('delete', old.id, old.original_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE OF original_name ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, original_name)
+                VALUES ('delete', old.id, old.original_name);
+                INSERT INTO documents_fts(rowid, original_name) VALUES (new.id, new.original_name);
+            END;
+        """)
+        conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+    
     def get_user_quota(self, user_id: str, role: str = "publico") -> UserQuota:
         """Obtém quota do usuário"""
         conn = sqlite3.connect(self.db_path)
@@ -170,9 +243,10 @@ class DocumentManager:
         Returns:
             Document se sucesso, None se excedeu quota
         """
-        # Ler arquivo
-        file_content = file.read()
-        file_size = len(file_content)
+        # Tamanho sem materializar o arquivo em memória
+        file.seek(0, os.SEEK_END)
+        file_size = file.tell()
+        file.seek(0)
         file_size_mb = file_size / (1024 * 1024)
         
         # Verificar quota (apenas para documentos não-globais)
@@ -181,11 +255,6 @@ class DocumentManager:
             if quota.used_mb + file_size_mb > quota.quota_mb:
                 return None  # Quota excedida
         
-        # Gerar nome único
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_hash = hashlib.md5(file_content).hexdigest()[:8]
-        filename = f"{timestamp}_{file_hash}_{original_name}"
-        
         # Determinar diretório
         if is_global:
             doc_dir = self.docs_dir / "global"
@@ -193,11 +262,21 @@ class DocumentManager:
             doc_dir = self.docs_dir / "users" / user_id
         
         doc_dir.mkdir(parents=True, exist_ok=True)
-        file_path = doc_dir / filename
         
-        # Salvar arquivo
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+        # Salvar arquivo em blocos, calculando o hash no caminho
+        file_md5 = hashlib.md5()
+        with tempfile.NamedTemporaryFile(dir=doc_dir, suffix=".part", delete=False) as f:
+            tmp_path = Path(f.name)
+            while block := file.read(COPY_BLOCK_SIZE):
+                file_md5.update(block)
+                f.write(block)
+        
+        # Gerar nome único
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_hash = file_md5.hexdigest()[:8]
+        filename = f"{timestamp}_{file_hash}_{original_name}"
+        file_path = doc_dir / filename
+        os.replace(tmp_path, file_path)
         
         # Registrar no banco
         conn = sqlite3.connect(self.db_path)
@@ -266,13 +345,14 @@ class DocumentManager:
             return Document(*row)
         return None
     
-    def list_user_documents(self, user_id: str) -> List[Document]:
-        """Lista documentos do usuário"""
+    def list_user_documents(self, user_id: str, include_global: bool = True) -> List[Document]:
+        """Lista documentos do usuário (e, por padrão, os globais)"""
+        where = "user_id = ? OR is_global = 1" if include_global else "user_id = ?"
         conn = sqlite3.connect(self.db_path)
         cursor = conn.execute(
-            """SELECT id, filename, original_name, user_id, is_global, file_size,
+            f"""SELECT id, filename, original_name, user_id, is_global, file_size,
             upload_date, processed, num_chunks, status
-            FROM documents WHERE user_id = ? OR is_global = 1
+            FROM documents WHERE {where}
             ORDER BY upload_date DESC""",
             (user_id,)
         )
@@ -280,13 +360,44 @@ class DocumentManager:
         conn.close()
         return docs
     
-    def list_all_documents(self) -> List[Document]:
-        """Lista todos os documentos (admin only)"""
+    def list_global_docs_excluding(self, user_id: str, limit: int = 10) -> List[Document]:
+        """Lista os documentos globais mais recentes de outros usuários"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.execute(
             """SELECT id, filename, original_name, user_id, is_global, file_size,
             upload_date, processed, num_chunks, status
-            FROM documents ORDER BY upload_date DESC"""
+            FROM documents WHERE is_global = 1 AND user_id <> ?
+            ORDER BY upload_date DESC LIMIT ?""",
+            (user_id, limit)
+        )
+        docs = [Document(*row) for row in cursor.fetchall()]
+        conn.close()
+        return docs
+    
+    def list_all_documents(
+        self,
+        filter_global: Optional[bool] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Document]:
+        """
+        Lista documentos (admin only), mais recentes primeiro
+        
+        Args:
+            filter_global: True só globais, False só pessoais, None todos
+            limit: Máximo de documentos (None = sem limite)
+            offset: Quantos documentos pular (paginação)
+        """
+        where, params = "", []
+        if filter_global is not None:
+            where, params = "WHERE is_global = ?", [int(filter_global)]
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            f"""SELECT id, filename, original_name, user_id, is_global, file_size,
+            upload_date, processed, num_chunks, status
+            FROM documents {where} ORDER BY upload_date DESC LIMIT ? OFFSET ?""",
+            params + [-1 if limit is None else limit, offset]
         )
         docs = [Document(*row) for row in cursor.fetchall()]
         conn.close()
@@ -27,6 +27,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import settings
 
 
+def quantize_int8(embedding: np.ndarray) -> np.ndarray:
+    """
+    Quantize an embedding to int8 for compact storage and faster similarity.
+    
+    Each vector is scaled by its own max magnitude; cosine similarity is
+    scale invariant, so no per-row scale needs to be stored.
+    """
+    embedding = np.asarray(embedding, dtype=np.float32)
+    peak = float(np.abs(embedding).max()) if embedding.size else 0.0
+    if peak == 0.0:
+        return np.zeros(embedding.shape, dtype=np.int8)
+    return np.clip(np.rint(embedding * (127.0 / peak)), -127, 127).astype(np.int8)
+
+
 class EmbeddingService:
     """
     Generates embeddings using configurable providers.
@@ -50,4 +50,19 @@ class LLMService:
             print(f"Error calling LLM: {e}")
             return None
 
+    def prewarm_prefix(self, system_content):
+        """
+        Send the system prefix ahead of the real request so backends with
+        automatic prefix caching reuse its prefill. Best effort; errors are ignored.
+        """
+        try:
+            self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": system_content}],
+                max_tokens=1,
+                stream=False
+            )
+        except Exception as e:
+            print(f"Prefix prewarm failed: {e}")
+
 llm_service = LLMService()
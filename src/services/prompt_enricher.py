@@ -107,6 +107,36 @@ Conteúdo:
         
         return "\n\n".join(parts) if parts else ""
     
+    def build_system_prefix(
+        self,
+        chunks: List[Dict[str, Any]],
+        max_chunks: int = 5,
+        context_block: Optional[str] = None
+    ) -> str:
+        """
+        Build the leading part of the system message (instructions + sources).
+        
+        This prefix only depends on the retrieved chunks, so it can be sent
+        ahead of time to warm the LLM backend's prefix cache.
+        """
+        if context_block is None:
+            context_block = self.build_context_block(chunks, max_chunks)
+        
+        system_content = self.system_prompt
+        
+        if context_block:
+            system_content += "\n\n## ⚠️ FONTES DISPONÍVEIS - LEIA COM ATENÇÃO\n\n"
+            system_content += "**REGRA CRÍTICA**: Você DEVE usar EXCLUSIVAMENTE os trechos abaixo como fonte de informação. "
+            system_content += "NÃO use conhecimento prévio, NÃO invente datas, NÃO adivinhe informações.\n\n"
+            system_content += "**DATAS E NÚMEROS**: Use APENAS as datas que aparecem EXPLICITAMENTE nos documentos abaixo. "
+            system_content += "Se um documento se chama 'ATA CONSUNI 03-06-2025.pdf', a reunião foi em JUNHO DE 2025, NÃO em 2024!\n\n"
+            system_content += "**CITAÇÃO OBRIGATÓRIA**: Cite a fonte entre colchetes (ex: [Fonte 1]).\n\n"
+            system_content += "**SE NÃO HOUVER INFORMAÇÃO**: Diga claramente 'Não encontrei essa informação nos documentos disponíveis'.\n\n"
+            system_content += "---\n\n"
+            system_content += context_block
+        
+        return system_content
+    
     def enrich(
         self,
         user_question: str,
@@ -142,19 +172,8 @@ Conteúdo:
             agent_tool
         )
         
-        # Build system message
-        system_content = self.system_prompt
-        
-        if context_block:
-            system_content += "\n\n## ⚠️ FONTES DISPONÍVEIS - LEIA COM ATENÇÃO\n\n"
-            system_content += "**REGRA CRÍTICA**: Você DEVE usar EXCLUSIVAMENTE os trechos abaixo como fonte de informação. "
-            system_content += "NÃO use conhecimento prévio, NÃO invente datas, NÃO adivinhe informações.\n\n"
-            system_content += "**DATAS E NÚMEROS**: Use APENAS as datas que aparecem EXPLICITAMENTE nos documentos abaixo. "
-            system_content += "Se um documento se chama 'ATA CONSUNI 03-06-2025.pdf', a reunião foi em JUNHO DE 2025, NÃO em 2024!\n\n"
-            system_content += "**CITAÇÃO OBRIGATÓRIA**: Cite a fonte entre colchetes (ex: [Fonte 1]).\n\n"
-            system_content += "**SE NÃO HOUVER INFORMAÇÃO**: Diga claramente 'Não encontrei essa informação nos documentos disponíveis'.\n\n"
-            system_content += "---\n\n"
-            system_content += context_block
+        # Build system message (static instructions + retrieved sources first)
+        system_content = self.build_system_prefix(chunks, max_chunks, context_block)
         
         if enrichment_info:
             system_content += "\n\n## INFORMAÇÕES ADICIONAIS\n\n"
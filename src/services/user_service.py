@@ -18,10 +18,14 @@ Compatibilidade: Python 3.11+
 
 import sqlite3
 import hashlib
+import hmac
 import base64
 import os
+import sys
+import time
+import threading
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 
 @dataclass
@@ -31,15 +35,35 @@ class User:
     role: str
 
 
+def _drop_cached_sessions(username: str):
+    """Invalidate AuthService's cached session lookups for a user whose account changed"""
+    # Looked up rather than imported: importing auth would start the service as a side effect,
+    # and components import this module as services.* while the app uses src.services.*
+    for name in ("src.services.auth", "services.auth"):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.invalidate_user_sessions(username)
+
+
 class UserService:
     """Manages user authentication and authorization"""
     
     VALID_ROLES = ["publico", "secs", "admin"]
     
+    # Seconds a successful login is remembered, so reruns and double
+    # submits skip the PBKDF2 derivation
+    AUTH_CACHE_TTL = 60
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self._init_tables()
+        
+        # (username, keyed digest of password) -> (password_hash, expires_at);
+        # the per-process key keeps plain fast hashes of passwords out of memory
+        self._auth_key = os.urandom(32)
+        self._auth_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._auth_cache_lock = threading.Lock()
     
     def _init_tables(self):
         """Initialize users table"""
@@ -135,12 +159,29 @@ class UserService:
             return None
         
         stored_hash, salt_b64, role = row
+        
+        # Recently verified with the same stored hash: skip the KDF
+        cache_key = (
+            username,
+            hmac.new(self._auth_key, password.encode('utf-8'), hashlib.sha256).hexdigest()
+        )
+        now = time.monotonic()
+        with self._auth_cache_lock:
+            cached = self._auth_cache.get(cache_key)
+        if cached and cached[0] == stored_hash and cached[1] > now:
+            return User(username=username, role=role)
+        
         salt = base64.b64decode(salt_b64)
         
         # Verify password
         candidate_hash = self._hash_password(password, salt)
         
         if candidate_hash == stored_hash:
+            with self._auth_cache_lock:
+                self._auth_cache = {
+                    k: v for k, v in self._auth_cache.items() if v[1] > now
+                }
+                self._auth_cache[cache_key] = (stored_hash, now + self.AUTH_CACHE_TTL)
             return User(username=username, role=role)
         
         return None
@@ -167,6 +208,15 @@ class UserService:
         
         return User(username=username, role=row[0])
     
+    def has_any_user(self) -> bool:
+        """
+        Check whether at least one user exists.
+        
+        Returns:
+            True if the users table is not empty
+        """
+        return self.conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None
+    
     def list_users(self) -> List[User]:
         """
         List all users.
@@ -201,6 +251,7 @@ class UserService:
             (new_role, username)
         )
         self.conn.commit()
+        _drop_cached_sessions(username)
         
         return cursor.rowcount > 0
     
@@ -221,6 +272,7 @@ class UserService:
             (username,)
         )
         self.conn.commit()
+        _drop_cached_sessions(username)
         
         return cursor.rowcount > 0
 
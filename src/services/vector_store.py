@@ -17,19 +17,66 @@ Compatibilidade: Python 3.11+
 """
 
 import sqlite3
+import threading
 import numpy as np
 import json
 from typing import List, Dict, Optional, Tuple
 from src.config import settings
 from src.services.document_processor import Document, Chunk
-from src.services.embeddings import get_embedding_service
+from src.services.embeddings import get_embedding_service, quantize_int8
+from src.utils.logger import get_logger
+
+try:
+    import simsimd
+    SIMSIMD_SUPPORT = True
+except ImportError:
+    SIMSIMD_SUPPORT = False
+
+try:
+    import hnswlib
+    HNSW_SUPPORT = True
+except ImportError:
+    HNSW_SUPPORT = False
+
+logger = get_logger(__name__)
+
+
+def cosine_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Cosine similarity of query against every row of matrix (SIMD kernels when available)"""
+    if SIMSIMD_SUPPORT:
+        distances = simsimd.cdist(query.reshape(1, -1), matrix, metric="cosine")
+        return 1.0 - np.asarray(distances, dtype=np.float32).reshape(-1)
+    if matrix.dtype != np.float32:
+        matrix = matrix.astype(np.float32)
+        query = query.astype(np.float32)
+    return (matrix @ query) / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+
+
+# Candidate columns for similarity search; the float32 blob is only read
+# for legacy rows that have no int8 copy yet
+_SEARCH_COLUMNS = """
+    c.id, c.conteudo, c.embedding_i8,
+    CASE WHEN c.embedding_i8 IS NULL THEN c.embedding END,
+    c.metadata, c.posicao,
+    d.tipo, d.titulo, d.numero, d.data, d.conselho,
+    d.user_id, d.is_global
+"""
+
 
 class VectorStore:
     """Stores and searches document chunks"""
     
+    # ANN candidates fetched per requested result, to survive permission filtering
+    ANN_OVERFETCH = 4
+    
     def __init__(self, db_path: str = None):
         self.db_path = db_path or settings.db_path_resolved
         self.embedding_service = get_embedding_service()
+        # HNSW index over chunks of one embedding dimension, extended as chunks are added
+        self._ann_index = None
+        self._ann_max_id = 0
+        self._ann_building = False
+        self._ann_lock = threading.Lock()
         self._init_db()
     
     def _init_db(self):
@@ -65,12 +112,31 @@ class VectorStore:
                 )
             """)
             
+            # Int8 copy of the embedding, used by search (added after v7.0)
+            cur.execute("PRAGMA table_info(chunks)")
+            if "embedding_i8" not in {row[1] for row in cur.fetchall()}:
+                cur.execute("ALTER TABLE chunks ADD COLUMN embedding_i8 BLOB")
+            
             # Index for faster searches
             cur.execute("""
                 CREATE INDEX IF NOT EXISTS idx_chunks_documento 
                 ON chunks(documento_id)
             """)
             
+            # Indexes for the admin listing (ORDER BY criado_em DESC) and the
+            # per-tipo counts; refresh planner statistics when any is created
+            admin_indexes = {
+                "idx_documentos_criado": "ON documentos(criado_em DESC)",
+                "idx_documentos_tipo": "ON documentos(tipo)",
+            }
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            existing = {row[0] for row in cur.fetchall()}
+            missing = [name for name in admin_indexes if name not in existing]
+            for name in missing:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} {admin_indexes[name]}")
+            if missing:
+                cur.execute("ANALYZE")
+            
             conn.commit()
     
     def add_documents(self, documents: List[Document], chunks_per_doc: List[List[Chunk]]):
@@ -108,14 +174,80 @@ class VectorStore:
                     metadata_json = json.dumps(chunk.metadata, ensure_ascii=False)
                     
                     cur.execute("""
-                        INSERT INTO chunks (documento_id, conteudo, embedding, metadata, posicao)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (doc_id, chunk.conteudo, embedding_blob, metadata_json, chunk.posicao))
+                        INSERT INTO chunks (documento_id, conteudo, embedding, embedding_i8, metadata, posicao)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (doc_id, chunk.conteudo, embedding_blob, quantize_int8(embedding).tobytes(),
+                          metadata_json, chunk.posicao))
                 
                 print(f"Added document: {doc.titulo} with {len(chunks)} chunks")
             
             conn.commit()
     
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a query once so it can be reused across several searches"""
+        return self.embedding_service.generate_embedding(text)
+    
+    @staticmethod
+    def _permission_clause(user_id: Optional[str]) -> Tuple[str, List]:
+        """Build the document visibility filter for a user"""
+        if user_id:
+            # User sees: global docs + their private docs
+            return "(d.is_global = 1 OR d.user_id = ?)", [user_id]
+        # No user: only global docs
+        return "d.is_global = 1", []
+    
+    def _rank(self, rows: List[Tuple], query_embedding: np.ndarray, k: int) -> List[Dict]:
+        """
+        Score candidate rows against the query in one vectorized pass.
+        
+        Rows follow _SEARCH_COLUMNS. Rows with an int8 embedding are scored
+        against the int8-quantized query; legacy rows use float32. Only the
+        top k rows are turned into result dicts.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        # Rows embedded with another model (different dimension) cannot be compared
+        dim = query.shape[0]
+        i8_rows = [row for row in rows if row[2] is not None and len(row[2]) == dim]
+        f32_rows = [row for row in rows if row[2] is None and row[3] is not None and len(row[3]) == 4 * dim]
+        rows = i8_rows + f32_rows
+        if not rows:
+            return []
+        
+        # Cosine similarity for all candidates in one batched call per dtype
+        parts = []
+        if i8_rows:
+            matrix = np.frombuffer(b"".join(row[2] for row in i8_rows), dtype=np.int8).reshape(len(i8_rows), -1)
+            parts.append(cosine_scores(matrix, quantize_int8(query)))
+        if f32_rows:
+            matrix = np.frombuffer(b"".join(row[3] for row in f32_rows), dtype=np.float32).reshape(len(f32_rows), -1)
+            parts.append(cosine_scores(matrix, query))
+        scores = np.concatenate(parts)
+        
+        if k < len(rows):
+            top = np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        
+        results = []
+        for i in top:
+            chunk_id, conteudo, _, _, metadata_json, posicao, tipo, titulo, numero, data, conselho, doc_user_id, is_global = rows[i]
+            results.append({
+                'chunk_id': chunk_id,
+                'conteudo': conteudo,
+                'similarity': float(scores[i]),
+                'metadata': json.loads(metadata_json) if metadata_json else {},
+                'tipo': tipo,
+                'titulo': titulo,
+                'numero': numero,
+                'data': data,
+                'conselho': conselho,
+                'posicao': posicao,
+                'user_id': doc_user_id,
+                'is_global': bool(is_global)
+            })
+        return results
+    
     def search(self, query: str, k: int = 5, user_id: Optional[str] = None) -> List[Dict]:
         """
         Search for similar chunks with user-scoped permissions.
@@ -128,73 +260,11 @@ class VectorStore:
         Returns:
             List of chunks with similarity scores, filtered by permissions
         """
-        # Generate query embedding
-        query_embedding = self.embedding_service.generate_embedding(query)
-        
-        # Build query with permission filter
-        if user_id:
-            # User sees: global docs + their private docs
-            permission_filter = """
-                WHERE d.is_global = 1 OR d.user_id = ?
-            """
-            params = (user_id,)
-        else:
-            # No user: only global docs
-            permission_filter = """
-                WHERE d.is_global = 1
-            """
-            params = ()
-        
-        # Get all chunks with permission filter
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            query_sql = f"""
-                SELECT c.id, c.conteudo, c.embedding, c.metadata, c.posicao,
-                       d.tipo, d.titulo, d.numero, d.data, d.conselho,
-                       d.user_id, d.is_global
-                FROM chunks c
-                JOIN documentos d ON c.documento_id = d.id
-                {permission_filter}
-            """
-            
-            cur.execute(query_sql, params)
-            
-            results = []
-            for row in cur.fetchall():
-                chunk_id, conteudo, embedding_blob, metadata_json, posicao, tipo, titulo, numero, data, conselho, doc_user_id, is_global = row
-                
-                # Deserialize embedding
-                embedding = np.frombuffer(embedding_blob, dtype=np.float32)
-                
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding, embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(embedding)
-                )
-                
-                metadata = json.loads(metadata_json) if metadata_json else {}
-                
-                results.append({
-                    'chunk_id': chunk_id,
-                    'conteudo': conteudo,
-                    'similarity': float(similarity),
-                    'metadata': metadata,
-                    'tipo': tipo,
-                    'titulo': titulo,
-                    'numero': numero,
-                    'data': data,
-                    'conselho': conselho,
-                    'posicao': posicao,
-                    'user_id': doc_user_id,
-                    'is_global': bool(is_global)
-                })
-            
-            # Sort by similarity and return top k
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:k]
+        return self.search_by_embedding(self.embed(query), k=k, user_id=user_id)
     
     def search_by_embedding(self, embedding: np.ndarray, k: int = 5, user_id: Optional[str] = None) -> List[Dict]:
         """
-        Search using pre-computed embedding (for HyDE).
+        Search using pre-computed embedding (for HyDE and shared query embeddings).
         
         Args:
             embedding: Pre-computed query embedding
@@ -204,66 +274,22 @@ class VectorStore:
         Returns:
             List of chunks with similarity scores
         """
-        # Build query with permission filter
-        if user_id:
-            permission_filter = """
-                WHERE d.is_global = 1 OR d.user_id = ?
-            """
-            params = (user_id,)
-        else:
-            permission_filter = """
-                WHERE d.is_global = 1
-            """
-            params = ()
+        permission_filter, params = self._permission_clause(user_id)
         
         # Get all chunks with permission filter
         with sqlite3.connect(self.db_path) as conn:
             cur = conn.cursor()
-            query_sql = f"""
-                SELECT c.id, c.conteudo, c.embedding, c.metadata, c.posicao,
-                       d.tipo, d.titulo, d.numero, d.data, d.conselho,
-                       d.user_id, d.is_global
+            cur.execute(f"""
+                SELECT {_SEARCH_COLUMNS}
                 FROM chunks c
                 JOIN documentos d ON c.documento_id = d.id
-                {permission_filter}
-            """
-            
-            cur.execute(query_sql, params)
-            
-            results = []
-            for row in cur.fetchall():
-                chunk_id, conteudo, embedding_blob, metadata_json, posicao, tipo, titulo, numero, data, conselho, doc_user_id, is_global = row
-                
-                # Deserialize embedding
-                chunk_embedding = np.frombuffer(embedding_blob, dtype=np.float32)
-                
-                # Calculate cosine similarity with provided embedding
-                similarity = np.dot(embedding, chunk_embedding) / (
-                    np.linalg.norm(embedding) * np.linalg.norm(chunk_embedding)
-                )
-                
-                metadata = json.loads(metadata_json) if metadata_json else {}
-                
-                results.append({
-                    'chunk_id': chunk_id,
-                    'conteudo': conteudo,
-                    'similarity': float(similarity),
-                    'metadata': metadata,
-                    'tipo': tipo,
-                    'titulo': titulo,
-                    'numero': numero,
-                    'data': data,
-                    'conselho': conselho,
-                    'posicao': posicao,
-                    'user_id': doc_user_id,
-                    'is_global': bool(is_global)
-                })
+                WHERE {permission_filter}
+            """, params)
             
-            # Sort by similarity and return top k
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:k]
+            return self._rank(cur.fetchall(), embedding, k)
     
-    def search_with_filter(self, query: str, filters: Dict, k: int = 5, user_id: Optional[str] = None) -> List[Dict]:
+    def search_with_filter(self, query: str, filters: Dict, k: int = 5, user_id: Optional[str] = None,
+                           query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
         """
         Search with metadata filters and user permissions.
         
@@ -272,20 +298,15 @@ class VectorStore:
             filters: Dict with filter criteria
             k: Number of results
             user_id: User ID for permission filtering
+            query_embedding: Pre-computed embedding of query (skips re-embedding)
         """
         # Generate query embedding
-        query_embedding = self.embedding_service.generate_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.embed(query)
         
         # Build SQL query with filters
-        where_clauses = []
-        params = []
-        
-        # Permission filter
-        if user_id:
-            where_clauses.append("(d.is_global = 1 OR d.user_id = ?)")
-            params.append(user_id)
-        else:
-            where_clauses.append("d.is_global = 1")
+        permission_filter, params = self._permission_clause(user_id)
+        where_clauses = [permission_filter]
         
         # Type filters
         if 'tipo' in filters:
@@ -300,47 +321,135 @@ class VectorStore:
             where_clauses.append("d.numero = ?")
             params.append(filters['numero'])
         
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        where_sql = " AND ".join(where_clauses)
         
         with sqlite3.connect(self.db_path) as conn:
             cur = conn.cursor()
             cur.execute(f"""
-                SELECT c.id, c.conteudo, c.embedding, c.metadata, c.posicao,
-                       d.tipo, d.titulo, d.numero, d.data, d.conselho,
-                       d.user_id, d.is_global
+                SELECT {_SEARCH_COLUMNS}
                 FROM chunks c
                 JOIN documentos d ON c.documento_id = d.id
                 WHERE {where_sql}
             """, params)
             
-            results = []
-            for row in cur.fetchall():
-                chunk_id, conteudo, embedding_blob, metadata_json, posicao, tipo, titulo, numero, data, conselho, doc_user_id, is_global = row
-                
-                embedding = np.frombuffer(embedding_blob, dtype=np.float32)
-                similarity = np.dot(query_embedding, embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(embedding)
-                )
-                
-                metadata = json.loads(metadata_json) if metadata_json else {}
-                
-                results.append({
-                    'chunk_id': chunk_id,
-                    'conteudo': conteudo,
-                    'similarity': float(similarity),
-                    'metadata': metadata,
-                    'tipo': tipo,
-                    'titulo': titulo,
-                    'numero': numero,
-                    'data': data,
-                    'conselho': conselho,
-                    'posicao': posicao,
-                    'user_id': doc_user_id,
-                    'is_global': bool(is_global)
-                })
+            return self._rank(cur.fetchall(), query_embedding, k)
+    
+    def _ann_candidates(self, conn: sqlite3.Connection, query_embedding: np.ndarray,
+                        n: int) -> Optional[Tuple[List[int], int]]:
+        """
+        Nearest chunk ids from the HNSW index and the index size.
+        
+        Chunks added since the last call are appended with add_items. Returns
+        None while no index exists for the query's dimension; its build is
+        then started in the background.
+        """
+        dim = len(query_embedding)
+        with self._ann_lock:
+            index = self._ann_index
+            if index is None or index.dim != dim:
+                self._start_ann_build(dim)
+                return None
+            
+            # Only rows past the last indexed id are read; other dimensions are skipped
+            rows = conn.execute(
+                "SELECT id, embedding FROM chunks WHERE id > ? AND length(embedding) = ? ORDER BY id",
+                (self._ann_max_id, dim * 4)
+            ).fetchall()
+            if rows:
+                needed = index.get_current_count() + len(rows)
+                if needed > index.get_max_elements():
+                    index.resize_index(max(needed, 2 * index.get_max_elements()))
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), dim)
+                index.add_items(matrix, ids)
+                self._ann_max_id = int(ids[-1])
             
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:k]
+            total = index.get_current_count()
+            if total == 0:
+                return [], 0
+            labels, _ = index.knn_query(np.asarray(query_embedding, dtype=np.float32), k=min(n, total))
+        return [int(label) for label in labels[0]], total
+    
+    def _start_ann_build(self, dim: int):
+        """Build the HNSW index for one embedding dimension off the request path (caller holds _ann_lock)"""
+        if self._ann_building:
+            return
+        self._ann_building = True
+        threading.Thread(target=self._build_ann_index, args=(dim,), name="secs-ann-build", daemon=True).start()
+    
+    def _build_ann_index(self, dim: int):
+        """Index every chunk whose embedding has the given dimension"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT id, embedding FROM chunks WHERE length(embedding) = ? ORDER BY id",
+                    (dim * 4,)
+                ).fetchall()
+            
+            index = hnswlib.Index(space="cosine", dim=dim)
+            index.init_index(max_elements=max(2 * len(rows), 1024), ef_construction=200, M=16)
+            if rows:
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), dim)
+                index.add_items(matrix, ids)
+            index.set_ef(64)
+            
+            with self._ann_lock:
+                self._ann_index = index
+                self._ann_max_id = int(rows[-1][0]) if rows else 0
+        except Exception as e:
+            logger.error("HNSW index build failed", error=e)
+        finally:
+            with self._ann_lock:
+                self._ann_building = False
+    
+    def ann_search(self, query: str, k: int = 10, user_id: Optional[str] = None,
+                   query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Approximate nearest-neighbor search with user permissions (HNSW).
+        
+        Overfetches candidates from the index, applies the permission filter
+        in SQL and re-scores the survivors exactly. Ids of deleted chunks
+        drop out in the same query. Falls back to the brute-force scan when
+        hnswlib is missing, the index is still being built, or too few
+        candidates survive.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            user_id: User ID for permission filtering
+            query_embedding: Pre-computed embedding of query (skips re-embedding)
+        """
+        if query_embedding is None:
+            query_embedding = self.embed(query)
+        
+        if not HNSW_SUPPORT:
+            return self.search_by_embedding(query_embedding, k=k, user_id=user_id)
+        
+        permission_filter, params = self._permission_clause(user_id)
+        
+        with sqlite3.connect(self.db_path) as conn:
+            found = self._ann_candidates(conn, query_embedding, k * self.ANN_OVERFETCH)
+            if found is None:
+                return self.search_by_embedding(query_embedding, k=k, user_id=user_id)
+            candidate_ids, total = found
+            if not candidate_ids:
+                return []
+            
+            placeholders = ",".join("?" * len(candidate_ids))
+            cur = conn.execute(f"""
+                SELECT {_SEARCH_COLUMNS}
+                FROM chunks c
+                JOIN documentos d ON c.documento_id = d.id
+                WHERE c.id IN ({placeholders}) AND {permission_filter}
+            """, candidate_ids + params)
+            rows = cur.fetchall()
+        
+        if len(rows) < k and len(candidate_ids) < total:
+            # Permission filter removed too many neighbors; scan exactly instead
+            return self.search_by_embedding(query_embedding, k=k, user_id=user_id)
+        
+        return self._rank(rows, query_embedding, k)
     
     def get_stats(self) -> Dict:
         """Get database statistics"""
@@ -16,6 +16,8 @@ Compatibilidade: Python 3.11+
 ============================================================================
 """
 
+import re
+
 # System Prompt Principal
 SYSTEM_PROMPT = """Você é um assistente virtual especializado da Secretaria dos Conselhos Superiores (SECS) da Universidade Federal de Alagoas (UFAL).
 
@@ -164,26 +166,35 @@ KEYWORDS_OUT_OF_SCOPE = [
     "openai", "chatgpt", "programação", "código"
 ]
 
+# Padrão pré-compilado (uma única varredura do texto, sem laço Python por palavra)
+_OUT_OF_SCOPE_RE = re.compile("|".join(re.escape(k) for k in KEYWORDS_OUT_OF_SCOPE))
+
 def check_scope(message: str) -> bool:
     """
     Verifica se a mensagem está dentro do escopo do chatbot.
     Retorna True se estiver no escopo, False caso contrário.
-    """
-    message_lower = message.lower()
-    
-    # Verifica palavras fora de escopo
-    if any(keyword in message_lower for keyword in KEYWORDS_OUT_OF_SCOPE):
-        return False
-    
-    # Se menciona palavras do escopo, está ok
-    if any(keyword in message_lower for keyword in KEYWORDS_IN_SCOPE):
-        return True
-    
-    # Perguntas genéricas sobre a SECS são aceitas
-    if any(word in message_lower for word in ["quem", "o que", "como", "quando", "onde", "ajuda"]):
-        return True
     
-    return True  # Por padrão, aceita (pode ser ajustado)
+    Apenas palavras fora de escopo rejeitam a mensagem; palavras do escopo
+    e perguntas genéricas são aceitas, assim como todo o resto (padrão).
+    """
+    return _OUT_OF_SCOPE_RE.search(message.lower()) is None
+
+# Saudações e agradecimentos que dispensam reescrita por LLM e clarificação
+_GREETING_RE = re.compile(
+    r"^\W*(oi|ol[aá]|bom dia|boa tarde|boa noite|obrigad[oa]|valeu|tchau|at[eé] logo)\W*$",
+    re.IGNORECASE
+)
+
+# Mensagens com até esse número de palavras são tratadas como triviais
+# ("prazo de matrícula", com três, já é uma pergunta)
+TRIVIAL_PROMPT_MAX_WORDS = 2
+
+def is_trivial_prompt(message: str) -> bool:
+    """
+    Indica se a mensagem é curta ou uma saudação, caso em que o pipeline
+    pode pular a reescrita por LLM e o agente de clarificação.
+    """
+    return len(message.split()) <= TRIVIAL_PROMPT_MAX_WORDS or _GREETING_RE.match(message) is not None
 
 def build_messages_with_context(user_message: str, chat_history: list, system_prompt: str = SYSTEM_PROMPT) -> list:
     """
@@ -23,6 +23,29 @@ from typing import List, Dict
 from pathlib import Path
 
 
+def _link_documento(conn: sqlite3.Connection, doc_id: int) -> int:
+    """
+    Retorna o id em documentos ligado ao upload doc_id, criando a linha na
+    primeira indexação e gravando o vínculo em documents.documento_id
+    """
+    row = conn.execute(
+        "SELECT documento_id, filename, original_name, user_id, is_global FROM documents WHERE id = ?",
+        (doc_id,)
+    ).fetchone()
+    if row is None:
+        # Sem upload correspondente: mantém o id recebido
+        return doc_id
+    
+    documento_id, filename, original_name, user_id, is_global = row
+    if documento_id is None:
+        documento_id = conn.execute(
+            "INSERT INTO documentos (tipo, titulo, caminho, user_id, is_global) VALUES ('pdf', ?, ?, ?, ?)",
+            (original_name, filename, user_id, is_global)
+        ).lastrowid
+        conn.execute("UPDATE documents SET documento_id = ? WHERE id = ?", (documento_id, doc_id))
+    return documento_id
+
+
 def add_chunks_to_vector_store(chunks: List[Dict], db_path: str = "data/app.db"):
     """
     Adiciona chunks diretamente ao vector store.
@@ -43,7 +66,7 @@ def add_chunks_to_vector_store(chunks: List[Dict], db_path: str = "data/app.db")
     
     # Importar serviço de embeddings (usa configuração do .env)
     try:
-        from services.embeddings import get_embedding_service
+        from services.embeddings import get_embedding_service, quantize_int8
         
         print(f"🔢 Inicializando serviço de embeddings...")
         embedding_service = get_embedding_service()
@@ -57,46 +80,46 @@ def add_chunks_to_vector_store(chunks: List[Dict], db_path: str = "data/app.db")
         print("  3. Se EMBEDDING_PROVIDER=openai, configure OPENAI_API_KEY")
         raise
     
-    # Gerar embeddings
+    # Gerar embeddings em lote (uma chamada por batch em vez de uma por chunk)
     print(f"🔢 Gerando embeddings para {len(chunks)} chunks...")
-    embeddings = []
-    
-    for i, chunk in enumerate(chunks):
-        if i % 10 == 0:
-            print(f"  Processando chunk {i+1}/{len(chunks)}...")
-        
-        try:
-            emb = embedding_service.generate_embedding(chunk["text"])
-            embeddings.append(emb)
-        except Exception as e:
-            print(f"❌ Erro ao gerar embedding do chunk {i+1}: {e}")
-            raise
-    
-    # Inserir no banco
-    print(f"💾 Inserindo chunks no banco de dados...")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    try:
+        embeddings = embedding_service.batch_embed(
+            [chunk["text"] for chunk in chunks],
+            show_progress=False
+        )
+    except Exception as e:
+        print(f"❌ Erro ao gerar embeddings: {e}")
+        raise
     
+    # Preparar linhas para inserção
+    rows = []
     for chunk, embedding in zip(chunks, embeddings):
-        # Serializar embedding
-        embedding_blob = embedding.tobytes()
-        
-        # Preparar metadata
+        embedding = np.asarray(embedding, dtype=np.float32)
         metadata = chunk.get("metadata", {})
-        metadata_json = json.dumps(metadata, ensure_ascii=False)
-        
-        # Inserir chunk
-        cursor.execute("""
-            INSERT INTO chunks (documento_id, conteudo, embedding, metadata, posicao)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
+        rows.append((
             metadata.get("doc_id", 0),
             chunk["text"],
-            embedding_blob,
-            metadata_json,
+            embedding.tobytes(),
+            quantize_int8(embedding).tobytes(),
+            json.dumps(metadata, ensure_ascii=False),
             chunk.get("page", 0)
         ))
     
-    conn.commit()
-    conn.close()
+    # Inserir no banco numa única transação
+    print(f"💾 Inserindo chunks no banco de dados...")
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            # Chunks apontam para documentos (não para documents, a tabela de uploads)
+            linked = {doc_id: _link_documento(conn, doc_id) for doc_id in {row[0] for row in rows} if doc_id}
+            rows = [(linked.get(row[0], row[0]),) + row[1:] for row in rows]
+            conn.executemany("""
+                INSERT INTO chunks (documento_id, conteudo, embedding, embedding_i8, metadata, posicao)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+    finally:
+        conn.close()
+    
     print(f"✅ {len(chunks)} chunks adicionados com sucesso!")